@@ -0,0 +1,232 @@
+"""
+Nyatsime Independent College — admission control
+Every request is classified by route, charged to a token bucket for its client
+IP and class (429 + Retry-After when empty), then queued for one of a fixed
+number of execution slots. Logins and register-taking wait in the critical
+lane and are served first; bulk list dumps use the bulk lane, which may
+hold only a few slots. A full lane, or a wait longer than MAX_WAIT, is
+answered with 503 + Retry-After straight away instead of piling up.
+Counters: GET /api/admission
+"""
+
+import json, math, os, threading, time
+from collections import deque
+from http.server import ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+SLOTS      = int(os.environ.get('ADMIT_SLOTS', 8))        # requests executing at once
+BULK_SLOTS = max(1, SLOTS // 4)                           # of which bulk dumps may hold
+MAX_WAIT   = float(os.environ.get('ADMIT_WAIT', 5))       # seconds queued before 503
+ENABLED    = os.environ.get('ADMISSION', '1') != '0'
+
+LANES = ('critical', 'normal', 'bulk')                    # priority order
+QUEUE = {'critical': 64, 'normal': 32, 'bulk': 16}        # waiters per lane
+
+# route class → (lane, tokens per second per IP, burst). A whole school often
+# shares one IP, so every bucket is sized for a staffroom or a form, not a
+# person. Bulk exports are slowed by their lane's few slots, not by the bucket.
+CLASSES = {'login':      ('critical', 5.0,  60),
+           'attendance': ('critical', 10.0, 100),
+           'read':       ('normal',   20.0, 200),
+           'write':      ('normal',   10.0, 100),
+           'bulk':       ('bulk',     2.0,  40)}
+
+LOGINS = {'/api/staff/login', '/api/learner/login', '/api/master/login'}
+# List endpoints that dump the whole table unless one of their filters is given.
+# Only keys the handler turns into a WHERE clause count: ?_=1 or ?format= do not.
+# (/api/learners?approved= only picks pending vs approved, so it is no filter.)
+BULK   = {'/api/marks':        {'learner_id', 'staff_id', 'grade'},
+          '/api/attendance':   {'learner_id', 'grade', 'date'},
+          '/api/learners':     {'grade'},
+          '/api/staff':        set(),
+          '/api/fees':         {'learner_id'},
+          '/api/fee-payments': {'learner_id', 'fee_id'},
+          '/api/book-issues':  {'learner_id'}}
+
+def classify(method, path):
+    """Route class for a request line, or None for requests that bypass the gate."""
+    u = urlparse(path); p = u.path
+    if method == 'OPTIONS' or p in ('/', '/index.html', '/api/admission') or p.startswith('/static/'):
+        return None
+    if p in LOGINS: return 'login'
+    if method == 'POST' and p == '/api/attendance': return 'attendance'
+    if method == 'POST' and p == '/api/archive': return 'bulk'
+    if method == 'GET':
+        filtered = BULK.get(p, set()) & set(parse_qs(u.query))   # blank values are dropped
+        return 'bulk' if p in BULK and not filtered else 'read'
+    return 'write'
+
+# ── Token buckets ──────────────────────────────────────────
+class Limiter:
+    MAX_KEYS = 10000
+
+    def __init__(self, classes=CLASSES):
+        self.classes, self.buckets, self.lock = classes, {}, threading.Lock()
+
+    def take(self, ip, cls):
+        """0 if a token was taken, else seconds until the next one."""
+        _, rate, burst = self.classes[cls]
+        now = time.monotonic()
+        with self.lock:
+            tokens, stamp = self.buckets.get((ip, cls), (burst, now))
+            tokens = min(burst, tokens + (now - stamp) * rate)
+            if tokens >= 1:
+                self.buckets[(ip, cls)] = (tokens - 1, now); return 0
+            self.buckets[(ip, cls)] = (tokens, now)
+            if len(self.buckets) > self.MAX_KEYS: self._prune(now)
+            return (1 - tokens) / rate
+
+    def _prune(self, now):
+        # A bucket that has refilled completely is the same as no bucket.
+        for key, (tokens, stamp) in list(self.buckets.items()):
+            _, rate, burst = self.classes[key[1]]
+            if tokens + (now - stamp) * rate >= burst: del self.buckets[key]
+
+# ── Slots and lanes ────────────────────────────────────────
+class Gate:
+    def __init__(self, slots=SLOTS, bulk_slots=BULK_SLOTS, queue=QUEUE, max_wait=MAX_WAIT):
+        self.slots, self.bulk_slots, self.queue, self.max_wait = slots, bulk_slots, queue, max_wait
+        self.cond = threading.Condition()
+        self.running = {lane: 0 for lane in LANES}
+        self.waiting = {lane: deque() for lane in LANES}
+        self.service = 0.05   # EWMA of seconds per request, for Retry-After
+
+    def _free(self, lane):
+        if sum(self.running.values()) >= self.slots: return False
+        return lane != 'bulk' or self.running['bulk'] < self.bulk_slots
+
+    def _dispatch(self):
+        granted = False
+        for lane in LANES:
+            while self.waiting[lane] and self._free(lane):
+                ticket = self.waiting[lane].popleft()
+                ticket['granted'] = True; self.running[lane] += 1; granted = True
+        if granted: self.cond.notify_all()
+
+    def retry_after(self):
+        backlog = sum(self.running.values()) + sum(len(q) for q in self.waiting.values())
+        return max(1, math.ceil(self.service * backlog / self.slots))
+
+    def acquire(self, lane):
+        """(True, waited seconds) once a slot is held, or (False, reason)."""
+        t0 = time.monotonic()
+        with self.cond:
+            ahead = any(self.waiting[l] for l in LANES[:LANES.index(lane) + 1])
+            if not ahead and self._free(lane):
+                self.running[lane] += 1; return True, 0.0
+            if len(self.waiting[lane]) >= self.queue[lane]: return False, 'queue full'
+            ticket = {'granted': False}
+            self.waiting[lane].append(ticket)
+            deadline = t0 + self.max_wait
+            while not ticket['granted']:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    self.waiting[lane].remove(ticket); return False, 'queue timeout'
+                self.cond.wait(left)
+            return True, time.monotonic() - t0
+
+    def release(self, lane, seconds):
+        with self.cond:
+            self.running[lane] -= 1
+            self.service = 0.9 * self.service + 0.1 * seconds
+            self._dispatch()
+
+# ── Counters ───────────────────────────────────────────────
+class Counters:
+    FIELDS = ('admitted', 'limited', 'shed', 'timed_out')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_class = {c: dict.fromkeys(self.FIELDS, 0) for c in CLASSES}
+        self.wait_ms, self.max_wait_ms, self.started = 0.0, 0.0, time.time()
+
+    def add(self, cls, field, waited=0.0):
+        with self.lock:
+            self.by_class[cls][field] += 1
+            if field == 'admitted':
+                self.wait_ms += waited * 1000; self.max_wait_ms = max(self.max_wait_ms, waited * 1000)
+
+limiter, gate, counters = Limiter(), Gate(), Counters()
+
+def stats():
+    """Counters for this process (each --workers process keeps its own)."""
+    with counters.lock:
+        by_class = {c: dict(v) for c, v in counters.by_class.items()}
+        admitted = sum(v['admitted'] for v in by_class.values())
+        out = {'pid': os.getpid(), 'enabled': ENABLED, 'uptime_s': round(time.time() - counters.started),
+               'slots': gate.slots, 'bulk_slots': gate.bulk_slots, 'classes': by_class,
+               'avg_wait_ms': round(counters.wait_ms / admitted, 2) if admitted else 0.0,
+               'max_wait_ms': round(counters.max_wait_ms, 2)}
+    with gate.cond:
+        out['running'] = dict(gate.running)
+        out['queued']  = {lane: len(q) for lane, q in gate.waiting.items()}
+        out['avg_service_ms'] = round(gate.service * 1000, 2)
+    return out
+
+def reject(h, code, retry, message):
+    body = json.dumps({'success': False, 'message': message}).encode()
+    h.send_response(code)
+    h.send_header('Retry-After', str(max(1, math.ceil(retry))))
+    h.send_header('Content-Type', 'application/json')
+    h.send_header('Content-Length', str(len(body)))
+    h.send_header('Access-Control-Allow-Origin', '*')
+    h.end_headers(); h.wfile.write(body)
+    h.close_connection = True
+
+# ── Server side ────────────────────────────────────────────
+class Admitted:
+    """Handler mixin: each request passes the limiter and the gate before do_*()."""
+    _lane = None
+
+    def parse_request(self):
+        if not super().parse_request(): return False
+        cls = classify(self.command, self.path) if ENABLED else None
+        if cls is None: return True
+        wait = limiter.take(self.client_address[0], cls)
+        if wait:
+            counters.add(cls, 'limited')
+            reject(self, 429, wait, 'Too many requests, please wait a moment.'); return False
+        lane = CLASSES[cls][0]
+        ok, info = gate.acquire(lane)
+        if not ok:
+            counters.add(cls, 'shed' if info == 'queue full' else 'timed_out')
+            reject(self, 503, gate.retry_after(), 'Server busy, please try again shortly.'); return False
+        counters.add(cls, 'admitted', info)
+        self._lane, self._started = lane, time.monotonic()
+        return True
+
+    def handle_one_request(self):
+        try:
+            super().handle_one_request()
+        finally:
+            if self._lane:
+                gate.release(self._lane, time.monotonic() - self._started); self._lane = None
+
+class Server(ThreadingHTTPServer):
+    """Thread per connection; the gate, not the thread count, bounds the work.
+    Open connections are counted here rather than in the gate, so drain() also
+    waits for requests the gate never sees (ADMISSION=0, /static/, /)."""
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.active, self.idle = 0, threading.Condition()
+
+    def process_request(self, request, client_address):
+        with self.idle: self.active += 1
+        super().process_request(request, client_address)
+
+    def shutdown_request(self, request):
+        try:
+            super().shutdown_request(request)
+        finally:
+            with self.idle:
+                self.active -= 1; self.idle.notify_all()
+
+    def drain(self, timeout):
+        """Wait up to `timeout` seconds for open connections to finish (used on shutdown)."""
+        end = time.monotonic() + timeout
+        with self.idle:
+            while self.active and time.monotonic() < end:
+                self.idle.wait(end - time.monotonic())
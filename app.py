@@ -1,11 +1,14 @@
 import sqlite3, hashlib, os, json, re
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
+import spa, admission
 
 PORT = int(os.environ.get('PORT', 5000))
 DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'school.db')
 HTML_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'index.html')
+SCHEMA_VERSION = 1  # PRAGMA application_id once DDL + demo seed are in place
+                    # (user_version belongs to app_backup.py's schema)
 
 def get_db():
     conn = sqlite3.connect(DB)
@@ -16,7 +19,10 @@ def hash_pw(pw):
     return hashlib.sha256(pw.encode()).hexdigest()
 
 def init_db():
-    conn = get_db(); c = conn.cursor()
+    conn = get_db()
+    if conn.execute('PRAGMA application_id').fetchone()[0] >= SCHEMA_VERSION:
+        conn.close(); return
+    c = conn.cursor()
     c.execute('''CREATE TABLE IF NOT EXISTS staff (id INTEGER PRIMARY KEY AUTOINCREMENT, staff_id TEXT UNIQUE, first_name TEXT, last_name TEXT, email TEXT UNIQUE, password TEXT, phone TEXT, subject TEXT, classes_taught TEXT, role TEXT DEFAULT "Teacher", date_employed TEXT)''')
     c.execute('''CREATE TABLE IF NOT EXISTS learners (id INTEGER PRIMARY KEY AUTOINCREMENT, learner_id TEXT UNIQUE, first_name TEXT, last_name TEXT, email TEXT UNIQUE, password TEXT, phone TEXT, address TEXT, id_number TEXT, grade TEXT, date_of_birth TEXT, gender TEXT, next_of_kin_name TEXT, next_of_kin_relationship TEXT, next_of_kin_phone TEXT, next_of_kin_email TEXT)''')
     c.execute('''CREATE TABLE IF NOT EXISTS marks (id INTEGER PRIMARY KEY AUTOINCREMENT, learner_id TEXT, staff_id TEXT, subject TEXT, assessment_type TEXT, grade TEXT, score REAL, max_score REAL, comment TEXT, date_entered TEXT DEFAULT CURRENT_TIMESTAMP)''')
@@ -37,6 +43,7 @@ def init_db():
             ('LRN-001','STF-001','Mathematics','Test 2','Form 3A',85,100,'Excellent!'),
             ('LRN-001','STF-001','Mathematics','Assignment 1','Form 3A',92,100,'Outstanding!'),
         ])
+    c.execute(f'PRAGMA application_id = {SCHEMA_VERSION}')
     conn.commit(); conn.close()
 
 def send_json(h, data, code=200):
@@ -52,7 +59,7 @@ def read_body(h):
     length = int(h.headers.get('Content-Length',0))
     return json.loads(h.rfile.read(length)) if length else {}
 
-class Handler(BaseHTTPRequestHandler):
+class Handler(admission.Admitted, BaseHTTPRequestHandler):
     def log_message(self, fmt, *args): pass
 
     def do_OPTIONS(self):
@@ -65,16 +72,8 @@ class Handler(BaseHTTPRequestHandler):
     def do_GET(self):
         p = urlparse(self.path).path
         qs = parse_qs(urlparse(self.path).query)
-        if p == '/' or p == '/index.html':
-            try:
-                html = open(HTML_FILE,'rb').read()
-            except:
-                html = b'<h1>index.html not found</h1>'
-            self.send_response(200)
-            self.send_header('Content-Type','text/html; charset=utf-8')
-            self.send_header('Content-Length',str(len(html)))
-            self.end_headers()
-            self.wfile.write(html); return
+        if spa.serve(self, p, HTML_FILE): return
+        if p == '/api/admission': send_json(self, admission.stats()); return
         if p == '/api/stats':
             conn = get_db()
             send_json(self,{'total_learners':conn.execute('SELECT COUNT(*) FROM learners').fetchone()[0],'total_staff':conn.execute('SELECT COUNT(*) FROM staff').fetchone()[0],'total_marks':conn.execute('SELECT COUNT(*) FROM marks').fetchone()[0],'total_books':conn.execute('SELECT COUNT(*) FROM textbooks').fetchone()[0]})
@@ -131,6 +130,7 @@ class Handler(BaseHTTPRequestHandler):
         if p == '/api/learner/register':
             conn = get_db()
             try:
+                conn.execute('BEGIN IMMEDIATE')   # hold the write lock from count to insert
                 count = conn.execute('SELECT COUNT(*) FROM learners').fetchone()[0]
                 lid = f"LRN-{str(count+1).zfill(3)}"
                 conn.execute('INSERT INTO learners (learner_id,first_name,last_name,email,password,grade,gender,phone,address,id_number,date_of_birth,next_of_kin_name,next_of_kin_relationship,next_of_kin_phone,next_of_kin_email) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)',(lid,body.get('first_name',''),body.get('last_name',''),body.get('email',''),hash_pw(body.get('password','')),body.get('grade',''),body.get('gender',''),body.get('phone',''),body.get('address',''),body.get('id_number',''),body.get('date_of_birth',''),body.get('next_of_kin_name',''),body.get('next_of_kin_relationship',''),body.get('next_of_kin_phone',''),body.get('next_of_kin_email','')))
@@ -150,6 +150,7 @@ class Handler(BaseHTTPRequestHandler):
         if p == '/api/textbooks':
             conn = get_db()
             try:
+                conn.execute('BEGIN IMMEDIATE')   # hold the write lock from count to insert
                 count = conn.execute('SELECT COUNT(*) FROM textbooks').fetchone()[0]
                 bid = f"BK-{str(count+1).zfill(3)}"
                 conn.execute('INSERT INTO textbooks (book_id,title,subject,grade_level,author,publisher,isbn,edition,total_copies,condition_notes) VALUES (?,?,?,?,?,?,?,?,?,?)',(bid,body['title'],body.get('subject',''),body.get('grade_level',''),body.get('author',''),body.get('publisher',''),body.get('isbn',''),body.get('edition',''),body.get('total_copies',0),body.get('condition_notes','')))
@@ -171,8 +172,19 @@ class Handler(BaseHTTPRequestHandler):
             send_json(self,{'success':True}); return
         self.send_response(404); self.end_headers()
 
+def start_background(worker=0):
+    if worker == 0 and os.environ.get('SNAPSHOT_INTERVAL'):
+        import snapshot; snapshot.start_from_env(DB)
+
 if __name__ == '__main__':
+    import prefork
     init_db()
-    server = HTTPServer(('0.0.0.0',PORT),Handler)
+    workers = prefork.workers_arg()
+    spa.bundle(HTML_FILE)
+    server = admission.Server(('0.0.0.0',PORT),Handler)
     print(f"Server running on port {PORT}")
-    server.serve_forever()
+    if workers > 1:
+        prefork.serve(server, workers, on_worker=start_background, db=DB)
+    else:
+        start_background()
+        server.serve_forever()
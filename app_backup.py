@@ -6,12 +6,18 @@ Run: python app.py
 
 import sqlite3, hashlib, os, json, re
 from datetime import datetime, date
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
+import spa, admission   # attendance, library, groupcommit: imported where used
 
 DB   = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'school.db')
 PORT = int(os.environ.get('PORT', 5000))
 
+# Bump whenever the DDL or migrations in init_db() change. Stored in
+# PRAGMA user_version; app.py keeps its own number in PRAGMA application_id so
+# the two servers sharing school.db never reset each other's stamp.
+SCHEMA_VERSION = 5
+
 # ── Domain rules for self-registration ────────────────────
 STAFF_DOMAIN   = 'nyatsimestaff.ac.zw'
 STUDENT_DOMAIN = 'nyatsimestudent.ac.zw'
@@ -21,10 +27,6 @@ ADMIN_DOMAIN   = 'admin.ac.zw'
 MASTER_EMAIL = 'felixmangwendeboss@nyatsimestaff.ac.zw'
 MASTER_HASH  = hashlib.sha256('felixjaybee'.encode()).hexdigest()
 
-def load_file(name):
-    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
-    return open(path, encoding='utf-8').read() if os.path.exists(path) else f'<h1>{name} not found</h1>'
-
 def get_db():
     conn = sqlite3.connect(DB)
     conn.row_factory = sqlite3.Row
@@ -34,8 +36,13 @@ def get_db():
 def hash_pw(pw): return hashlib.sha256(pw.encode()).hexdigest()
 
 def new_id(prefix, table, conn):
-    n = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
-    return f'{prefix}-{str(n+1).zfill(4)}'
+    # AUTOINCREMENT high-water mark, not COUNT(*): rows moved to a year
+    # archive (or deleted) must never have their id handed out again.
+    # The write lock is taken before the read and held until the caller's
+    # INSERT commits, so concurrent requests (or --workers) never share an id.
+    if not conn.in_transaction: conn.execute('BEGIN IMMEDIATE')
+    r = conn.execute('SELECT seq FROM sqlite_sequence WHERE name=?',(table,)).fetchone()
+    return f'{prefix}-{str((r[0] if r else 0)+1).zfill(4)}'
 
 def email_domain(email):
     return email.split('@')[-1].lower().strip() if '@' in email else ''
@@ -46,7 +53,10 @@ def master_user():
 
 # ── DB init ────────────────────────────────────────────────
 def init_db():
-    conn = get_db(); c = conn.cursor()
+    conn = get_db()
+    if conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+        conn.close(); return
+    c = conn.cursor()
 
     c.execute('''CREATE TABLE IF NOT EXISTS staff (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -129,24 +139,51 @@ def init_db():
         try: c.execute(f'ALTER TABLE {tbl} ADD COLUMN {col}')
         except Exception: pass
 
+    # Attendance bitmaps + rollups, backfilled from existing register rows
+    import attendance, library
+    for sql in attendance.DDL: c.execute(sql)
+    attendance.rebuild(conn)
+    for sql in library.DDL: c.execute(sql)
+    library.reconcile(conn)
+
+    c.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
     conn.commit(); conn.close()
 
+MARK_INSERT = '''INSERT INTO marks
+    (learner_id,staff_id,subject,assessment_type,grade,term,score,max_score,comment)
+    VALUES (?,?,?,?,?,?,?,?,?)'''
+
 # ── HTTP helpers ───────────────────────────────────────────
 def cors(h):
     h.send_header('Access-Control-Allow-Origin','*')
     h.send_header('Access-Control-Allow-Methods','GET,POST,PUT,DELETE,OPTIONS')
     h.send_header('Access-Control-Allow-Headers','Content-Type')
 
-def json_ok(h, data, code=200):
+def json_ok(h, data, code=200, ctype='application/json'):
     body = json.dumps(data, default=str).encode()
     h.send_response(code)
-    h.send_header('Content-Type','application/json')
+    h.send_header('Content-Type',ctype)
     cors(h); h.end_headers(); h.wfile.write(body)
 
+# Opt-in compact list format: ?format=columnar or Accept: COLUMNAR gives
+# {"columns":[...],"rows":[[...],...]} straight from tuple rows, so column
+# names are sent once and no dict is built per row.
+COLUMNAR = 'application/vnd.nyatsime.columnar+json'
+
+def wants_columnar(h, qs):
+    return qs.get('format',[''])[0] == 'columnar' or COLUMNAR in h.headers.get('Accept','')
+
+def json_rows(h, qs, cur):
+    if wants_columnar(h, qs):
+        cur.row_factory = None
+        json_ok(h,{'columns':[d[0] for d in cur.description],'rows':cur.fetchall()},ctype=COLUMNAR)
+    else:
+        json_ok(h,[dict(r) for r in cur.fetchall()])
+
 def not_found(h):
     h.send_response(404); cors(h); h.end_headers()
 
-class Handler(BaseHTTPRequestHandler):
+class Handler(admission.Admitted, BaseHTTPRequestHandler):
     def log_message(self, fmt, *args): pass
 
     def do_OPTIONS(self):
@@ -165,22 +202,25 @@ class Handler(BaseHTTPRequestHandler):
         p  = parsed.path
         qs = parse_qs(parsed.query)
 
-        if p == '/':
-            body = load_file('index.html').encode()
-            self.send_response(200)
-            self.send_header('Content-Type','text/html; charset=utf-8')
-            self.send_header('Content-Length',str(len(body)))
-            self.end_headers(); self.wfile.write(body); return
+        # Shell + hashed, precompressed page modules split out of index.html
+        if spa.serve(self, p): return
+
+        if p == '/api/admission':
+            json_ok(self, admission.stats()); return
 
         if p == '/api/stats':
+            import archive
             conn = get_db()
-            tf = conn.execute('SELECT SUM(amount) FROM fees').fetchone()[0] or 0
-            tp = conn.execute('SELECT SUM(paid)   FROM fees').fetchone()[0] or 0
+            try: src = archive.sources(conn, qs.get('archived',[''])[0], DB)
+            except (ValueError, sqlite3.OperationalError) as e:
+                conn.close(); json_ok(self,{'error':str(e)},400); return
+            tf = conn.execute(f'SELECT SUM(amount) FROM {src["fees"]}').fetchone()[0] or 0
+            tp = conn.execute(f'SELECT SUM(paid)   FROM {src["fees"]}').fetchone()[0] or 0
             json_ok(self,{
                 'total_learners':   conn.execute('SELECT COUNT(*) FROM learners WHERE approved=1').fetchone()[0],
                 'pending_learners': conn.execute('SELECT COUNT(*) FROM learners WHERE approved=0').fetchone()[0],
                 'total_staff':      conn.execute('SELECT COUNT(*) FROM staff').fetchone()[0],
-                'total_marks':      conn.execute('SELECT COUNT(*) FROM marks').fetchone()[0],
+                'total_marks':      conn.execute(f'SELECT COUNT(*) FROM {src["marks"]}').fetchone()[0],
                 'total_books':      conn.execute('SELECT COUNT(*) FROM textbooks').fetchone()[0],
                 'total_notices':    conn.execute('SELECT COUNT(*) FROM notices').fetchone()[0],
                 'fees_collected':   round(float(tp),2),
@@ -196,8 +236,8 @@ class Handler(BaseHTTPRequestHandler):
             params = []
             if grade:           q += ' AND grade=?';    params.append(grade)
             if approved != 'all': q += ' AND approved=?'; params.append(int(approved))
-            rows = [dict(r) for r in conn.execute(q, params).fetchall()]
-            conn.close(); json_ok(self, rows); return
+            json_rows(self, qs, conn.execute(q, params))
+            conn.close(); return
 
         m = re.match(r'^/api/learners/(.+)$', p)
         if m:
@@ -211,10 +251,10 @@ class Handler(BaseHTTPRequestHandler):
 
         if p == '/api/staff':
             conn = get_db()
-            rows = [dict(r) for r in conn.execute(
+            json_rows(self, qs, conn.execute(
                 'SELECT staff_id,first_name,last_name,email,subject,classes_taught,role,phone,gender,qualification,date_employed,photo,status FROM staff'
-            ).fetchall()]
-            conn.close(); json_ok(self,rows); return
+            ))
+            conn.close(); return
 
         m = re.match(r'^/api/staff/([^/]+)$', p)
         if m and m.group(1) != 'login':
@@ -241,8 +281,35 @@ class Handler(BaseHTTPRequestHandler):
             if sid:   q += ' AND m.staff_id=?';   params.append(sid)
             if grade: q += ' AND m.grade=?';       params.append(grade)
             q += ' ORDER BY m.date_entered DESC'
-            rows = [dict(r) for r in conn.execute(q,params).fetchall()]
-            conn.close(); json_ok(self,rows); return
+            json_rows(self, qs, conn.execute(q,params))
+            conn.close(); return
+
+        # ── Attendance rollups (served from attendance_terms / attendance_daily) ──
+        if p.startswith('/api/attendance/'): import attendance
+        if p == '/api/attendance/rates':
+            conn = get_db()
+            tk  = attendance.term_key(qs)
+            lid = qs.get('learner_id',[''])[0]
+            json_ok(self, attendance.learner_rate(conn,lid,tk) if lid
+                    else attendance.rates(conn,tk,qs.get('grade',[''])[0]))
+            conn.close(); return
+
+        if p == '/api/attendance/chronic':
+            try: threshold = float(qs.get('threshold',[attendance.CHRONIC])[0])
+            except ValueError: threshold = -1
+            if not 0 <= threshold <= 1:
+                json_ok(self,{'error':'threshold must be a number from 0 to 1'},400); return
+            conn = get_db()
+            json_ok(self, attendance.chronic(conn, attendance.term_key(qs),
+                    threshold, qs.get('grade',[''])[0]))
+            conn.close(); return
+
+        if p == '/api/attendance/heatmap':
+            grade = qs.get('grade',[''])[0]
+            if not grade: json_ok(self,{'error':'grade is required'},400); return
+            conn = get_db()
+            json_ok(self, attendance.heatmap(conn, attendance.term_key(qs), grade))
+            conn.close(); return
 
         if p == '/api/attendance':
             conn = get_db()
@@ -256,8 +323,8 @@ class Handler(BaseHTTPRequestHandler):
             if grade: q += ' AND a.grade=?';       params.append(grade)
             if dt:    q += ' AND a.date=?';        params.append(dt)
             q += ' ORDER BY a.date DESC'
-            rows = [dict(r) for r in conn.execute(q,params).fetchall()]
-            conn.close(); json_ok(self,rows); return
+            json_rows(self, qs, conn.execute(q,params))
+            conn.close(); return
 
         if p == '/api/timetable':
             conn = get_db()
@@ -267,8 +334,8 @@ class Handler(BaseHTTPRequestHandler):
             params = []
             if grade: q += ' WHERE t.grade=?'; params.append(grade)
             q += ' ORDER BY t.day, t.period'
-            rows = [dict(r) for r in conn.execute(q,params).fetchall()]
-            conn.close(); json_ok(self,rows); return
+            json_rows(self, qs, conn.execute(q,params))
+            conn.close(); return
 
         if p == '/api/fees':
             conn = get_db()
@@ -278,8 +345,8 @@ class Handler(BaseHTTPRequestHandler):
             params = []
             if lid: q += ' AND f.learner_id=?'; params.append(lid)
             q += ' ORDER BY f.date_created DESC'
-            rows = [dict(r) for r in conn.execute(q,params).fetchall()]
-            conn.close(); json_ok(self,rows); return
+            json_rows(self, qs, conn.execute(q,params))
+            conn.close(); return
 
         if p == '/api/fee-payments':
             conn = get_db()
@@ -289,8 +356,8 @@ class Handler(BaseHTTPRequestHandler):
             params = []
             if lid:    q += ' AND learner_id=?'; params.append(lid)
             if fee_id: q += ' AND fee_id=?';     params.append(fee_id)
-            rows = [dict(r) for r in conn.execute(q+' ORDER BY date_paid DESC',params).fetchall()]
-            conn.close(); json_ok(self,rows); return
+            json_rows(self, qs, conn.execute(q+' ORDER BY date_paid DESC',params))
+            conn.close(); return
 
         if p == '/api/notices':
             conn = get_db()
@@ -300,13 +367,13 @@ class Handler(BaseHTTPRequestHandler):
             params = []
             if audience and audience != 'All':
                 q += ' AND (n.audience="All" OR n.audience=?)'; params.append(audience)
-            rows = [dict(r) for r in conn.execute(q+' ORDER BY n.date_posted DESC',params).fetchall()]
-            conn.close(); json_ok(self,rows); return
+            json_rows(self, qs, conn.execute(q+' ORDER BY n.date_posted DESC',params))
+            conn.close(); return
 
         if p == '/api/textbooks':
             conn = get_db()
-            rows = [dict(r) for r in conn.execute('SELECT * FROM textbooks').fetchall()]
-            conn.close(); json_ok(self,rows); return
+            json_rows(self, qs, conn.execute('SELECT * FROM textbooks'))
+            conn.close(); return
 
         if p == '/api/book-issues':
             conn = get_db()
@@ -316,8 +383,27 @@ class Handler(BaseHTTPRequestHandler):
                  'LEFT JOIN learners l ON bi.learner_id=l.learner_id WHERE 1=1')
             params = []
             if lid: q += ' AND bi.learner_id=?'; params.append(lid)
-            rows = [dict(r) for r in conn.execute(q+' ORDER BY bi.date_issued DESC',params).fetchall()]
-            conn.close(); json_ok(self,rows); return
+            json_rows(self, qs, conn.execute(q+' ORDER BY bi.date_issued DESC',params))
+            conn.close(); return
+
+        # ── Library circulation ──
+        if p.startswith('/api/library/'): import library
+        if p == '/api/library/overdue':
+            conn = get_db()
+            json_rows(self, qs, library.overdue(conn, learner_id=qs.get('learner_id',[''])[0],
+                                                grade=qs.get('grade',[''])[0]))
+            conn.close(); return
+
+        if p == '/api/library/availability':
+            conn = get_db()
+            json_rows(self, qs, library.availability(conn, qs.get('book_id',[''])[0],
+                      qs.get('subject',[''])[0], qs.get('grade_level',[''])[0]))
+            conn.close(); return
+
+        if p == '/api/archives':
+            import archive
+            json_ok(self,[{'year':y,'bytes':os.path.getsize(archive.archive_path(y,DB))}
+                          for y in archive.archived_years(DB)]); return
 
         if p == '/api/grades':
             json_ok(self,['Form 1A','Form 1B','Form 2A','Form 2B','Form 3A','Form 3B',
@@ -328,16 +414,20 @@ class Handler(BaseHTTPRequestHandler):
         if m:
             lid  = m.group(1)
             term = qs.get('term',[''])[0]
+            import archive, attendance
             conn = get_db()
             learner = conn.execute('SELECT * FROM learners WHERE learner_id=?',(lid,)).fetchone()
             if not learner: conn.close(); json_ok(self,{'error':'Not found'},404); return
-            mq = 'SELECT * FROM marks WHERE learner_id=?'; mp = [lid]
+            try: src = archive.sources(conn, qs.get('archived',[''])[0], DB)
+            except (ValueError, sqlite3.OperationalError) as e:
+                conn.close(); json_ok(self,{'error':str(e)},400); return
+            mq = f'SELECT * FROM {src["marks"]} WHERE learner_id=?'; mp = [lid]
             if term: mq += ' AND term=?'; mp.append(term)
             marks = [dict(r) for r in conn.execute(mq,mp).fetchall()]
-            att   = conn.execute('SELECT status,COUNT(*) as cnt FROM attendance WHERE learner_id=? GROUP BY status',(lid,)).fetchall()
+            att   = attendance.summary(conn, lid, src['attendance_terms'])
             conn.close()
             d = dict(learner); d.pop('password',None)
-            json_ok(self,{'learner':d,'marks':marks,'attendance':{r['status']:r['cnt'] for r in att}}); return
+            json_ok(self,{'learner':d,'marks':marks,'attendance':att}); return
 
         not_found(self)
 
@@ -514,31 +604,47 @@ class Handler(BaseHTTPRequestHandler):
             return
 
         # ── Marks ──
+        # Marks go through the group-commit writer: one fsync per batch, and the
+        # reply is sent only once the batch holding this mark is committed.
+        if p in ('/api/marks', '/api/marks/grid'): import groupcommit
         if p == '/api/marks':
-            conn = get_db()
             try:
-                conn.execute('''INSERT INTO marks
-                    (learner_id,staff_id,subject,assessment_type,grade,term,score,max_score,comment)
-                    VALUES (?,?,?,?,?,?,?,?,?)''',
+                ids = groupcommit.submit(DB, [(MARK_INSERT,
                     (body['learner_id'],body['staff_id'],body['subject'],body['assessment_type'],
                      body.get('grade',''),body.get('term',''),body['score'],body['max_score'],
-                     body.get('comment','')))
-                conn.commit(); conn.close(); json_ok(self,{'success':True})
+                     body.get('comment','')))])
+                json_ok(self,{'success':True,'id':ids[0]})
             except Exception as e:
-                conn.close(); json_ok(self,{'success':False,'message':str(e)},400)
+                json_ok(self,{'success':False,'message':str(e)},400)
+            return
+
+        # One assessment for a whole class: {staff_id, subject, assessment_type, grade,
+        # term, max_score, scores: [{learner_id, score, comment}] or {learner_id: score}}
+        if p == '/api/marks/grid':
+            try:
+                scores = body['scores']
+                if isinstance(scores, dict): scores = [{'learner_id':k,'score':v} for k,v in scores.items()]
+                rows = [r for r in scores if r.get('score') not in (None,'')]   # blank = not assessed
+                if not rows: raise ValueError('No scores entered')
+                top = float(body['max_score'])
+                bad = [r['learner_id'] for r in rows if not 0 <= float(r['score']) <= top]
+                if bad: raise ValueError(f"Scores outside 0–{body['max_score']} for {', '.join(bad)}")
+                ids = groupcommit.submit(DB, [(MARK_INSERT,
+                    (r['learner_id'],body['staff_id'],body['subject'],body['assessment_type'],
+                     body.get('grade',''),body.get('term',''),r['score'],body['max_score'],
+                     r.get('comment',''))) for r in rows])
+                json_ok(self,{'success':True,'saved':len(ids)})
+            except Exception as e:
+                json_ok(self,{'success':False,'message':str(e)},400)
             return
 
         # ── Attendance ──
         if p == '/api/attendance':
+            import attendance
             conn = get_db()
             try:
                 recs = body if isinstance(body,list) else [body]
-                for rec in recs:
-                    conn.execute('''INSERT OR REPLACE INTO attendance
-                        (learner_id,date,status,grade,subject,staff_id,reason)
-                        VALUES (?,?,?,?,?,?,?)''',
-                        (rec['learner_id'],rec['date'],rec['status'],rec.get('grade',''),
-                         rec.get('subject',''),rec.get('staff_id',''),rec.get('reason','')))
+                attendance.record(conn, recs)
                 conn.commit(); conn.close(); json_ok(self,{'success':True})
             except Exception as e:
                 conn.close(); json_ok(self,{'success':False,'message':str(e)},400)
@@ -627,20 +733,28 @@ class Handler(BaseHTTPRequestHandler):
             return
 
         if p == '/api/book-issues':
+            import library
             conn = get_db()
             try:
-                iid = new_id('ISS','book_issues',conn)
-                conn.execute('''INSERT INTO book_issues
-                    (issue_id,book_id,learner_id,issued_by,due_date,condition_out,notes)
-                    VALUES (?,?,?,?,?,?,?)''',
-                    (iid,body['book_id'],body['learner_id'],body.get('issued_by',''),
-                     body.get('due_date',''),body.get('condition_out','Good'),body.get('notes','')))
-                conn.execute('UPDATE textbooks SET copies_issued=copies_issued+1 WHERE book_id=?',(body['book_id'],))
-                conn.commit(); conn.close(); json_ok(self,{'success':True,'issue_id':iid})
+                iid = library.issue(conn, body, new_id)
+                conn.close(); json_ok(self,{'success':True,'issue_id':iid})
+            except library.CirculationError as e:
+                conn.close(); json_ok(self,{'success':False,'message':str(e)},e.code)
             except Exception as e:
                 conn.close(); json_ok(self,{'success':False,'message':str(e)},400)
             return
 
+        # ── Close an academic year into school_<year>.db ──
+        if p == '/api/archive':
+            import archive
+            try:
+                moved = archive.close_year(body.get('year',''), DB,
+                                           keep_unpaid=not body.get('include_unpaid'))
+                json_ok(self,{'success':True,'year':str(body.get('year')),'moved':moved})
+            except Exception as e:
+                json_ok(self,{'success':False,'message':str(e)},400)
+            return
+
         if p == '/api/logout':
             json_ok(self,{'success':True}); return
 
@@ -671,15 +785,13 @@ class Handler(BaseHTTPRequestHandler):
 
         m = re.match(r'^/api/book-issues/(.+)/return$', p)
         if m:
+            import library
             conn = get_db()
             try:
-                iid   = m.group(1)
-                issue = conn.execute('SELECT * FROM book_issues WHERE issue_id=?',(iid,)).fetchone()
-                if not issue: conn.close(); json_ok(self,{'error':'Not found'},404); return
-                conn.execute('UPDATE book_issues SET date_returned=?,condition_in=? WHERE issue_id=?',
-                    (date.today().isoformat(),body.get('condition_in','Good'),iid))
-                conn.execute('UPDATE textbooks SET copies_issued=MAX(0,copies_issued-1) WHERE book_id=?',(issue['book_id'],))
-                conn.commit(); conn.close(); json_ok(self,{'success':True})
+                library.return_book(conn, m.group(1), body.get('condition_in','Good'))
+                conn.close(); json_ok(self,{'success':True})
+            except library.CirculationError as e:
+                conn.close(); json_ok(self,{'success':False,'error':str(e),'message':str(e)},e.code)
             except Exception as e:
                 conn.close(); json_ok(self,{'success':False,'message':str(e)},400)
             return
@@ -704,9 +816,20 @@ class Handler(BaseHTTPRequestHandler):
         not_found(self)
 
 
+def start_background(worker=0):
+    # Under --workers every process calls this; singleton jobs stay on worker 0.
+    if worker: return
+    if os.environ.get('SNAPSHOT_INTERVAL'):
+        import snapshot; snapshot.start_from_env(DB)
+    import library; library.start_from_env(DB)
+
+
 if __name__ == '__main__':
+    import prefork
     init_db()
-    server = HTTPServer(('0.0.0.0', PORT), Handler)
+    workers = prefork.workers_arg()
+    spa.bundle()
+    server = admission.Server(('0.0.0.0', PORT), Handler)
     print('\n' + '='*60)
     print('  🎓  Nyatsime Independent College Portal  v3')
     print(f'  🌐  http://localhost:{PORT}')
@@ -717,7 +840,11 @@ if __name__ == '__main__':
     print(f'  Master   →  {MASTER_EMAIL}')
     print('='*60)
     print('  Ctrl+C to stop\n')
-    try:
-        server.serve_forever()
-    except KeyboardInterrupt:
-        print('\nServer stopped.')
+    if workers > 1:
+        prefork.serve(server, workers, on_worker=start_background, db=DB)
+    else:
+        start_background()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print('\nServer stopped.')
@@ -0,0 +1,148 @@
+"""
+Nyatsime Independent College — academic-year archives
+Moves closed years of marks, attendance and fees out of school.db into
+school_<year>.db files that are ATTACHed only when a report asks for history.
+Run: python archive.py list | close <year>
+"""
+
+import sqlite3, os, re, glob
+from datetime import date
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB       = os.path.join(BASE_DIR, 'school.db')
+
+# Archived tables, in the order they are moved (payments before their fees).
+# marks.term is only "Term 1".."Term 3", so the year of a mark or register
+# entry comes from its date.
+YEAR_OF = {
+    'fee_payments':     'fee_id IN (SELECT fee_id FROM main.fees WHERE {fees})',
+    'fees':             "COALESCE(NULLIF(academic_year,''), substr(date_created,1,4))=:year",
+    'marks':            'substr(date_entered,1,4)=:year',
+    'attendance':       'substr(date,1,4)=:year',
+    'attendance_terms': 'substr(term_key,1,4)=:year',
+    'attendance_daily': 'substr(date,1,4)=:year',
+}
+ARCHIVED = tuple(YEAR_OF)
+
+def archive_path(year, db=DB):
+    return os.path.join(os.path.dirname(db), f'school_{year}.db')
+
+def archived_years(db=DB):
+    years = []
+    for p in glob.glob(os.path.join(os.path.dirname(db), 'school_*.db')):
+        m = re.match(r'^school_(\d{4})\.db$', os.path.basename(p))
+        if m: years.append(m.group(1))
+    return sorted(years)
+
+def columns(conn, schema, table):
+    return [r[1] for r in conn.execute(f'PRAGMA {schema}.table_info({table})').fetchall()]
+
+def predicate(table, keep_unpaid):
+    fees = YEAR_OF['fees'] + (" AND status='Paid'" if keep_unpaid else '')
+    return fees if table == 'fees' else YEAR_OF[table].format(fees=fees)
+
+# ── Closing a year ─────────────────────────────────────────
+def close_year(year, db=DB, keep_unpaid=True, force=False, vacuum=True):
+    """Move one academic year into school_<year>.db and VACUUM the hot database.
+
+    Fees that are not fully paid (and their payments) stay in school.db so
+    arrears remain visible and collectable. Returns {table: rows moved}.
+    """
+    year = str(year)
+    if not re.match(r'^\d{4}$', year):
+        raise ValueError(f'Not a year: {year!r}')
+    if not force and int(year) >= date.today().year:
+        raise ValueError(f'{year} is not closed yet.')
+    conn = sqlite3.connect(db)
+    moved = {}
+    try:
+        conn.execute('ATTACH DATABASE ? AS arch', (archive_path(year, db),))
+        for table in ARCHIVED:
+            sql = conn.execute("SELECT sql FROM main.sqlite_master WHERE type='table' AND name=?",
+                               (table,)).fetchone()
+            if not sql: continue
+            conn.execute(re.sub(r'^CREATE TABLE IF NOT EXISTS\s+|^CREATE TABLE\s+',
+                                'CREATE TABLE IF NOT EXISTS arch.', sql[0]))
+            have = set(columns(conn, 'arch', table))
+            for col in columns(conn, 'main', table):
+                if col not in have:
+                    conn.execute(f'ALTER TABLE arch.{table} ADD COLUMN {col}')
+        with conn:
+            for table in ARCHIVED:
+                cols = ','.join(columns(conn, 'main', table))
+                where = predicate(table, keep_unpaid)
+                cur = conn.execute(f'INSERT OR REPLACE INTO arch.{table} ({cols}) '
+                                   f'SELECT {cols} FROM main.{table} WHERE {where}', {'year': year})
+                moved[table] = cur.rowcount
+            for table in ARCHIVED:
+                conn.execute(f'DELETE FROM main.{table} WHERE {predicate(table, keep_unpaid)}',
+                             {'year': year})
+        conn.execute('DETACH DATABASE arch')
+        if vacuum and any(moved.values()):
+            conn.execute('VACUUM')
+    finally:
+        conn.close()
+    return moved
+
+# ── Reading across archives ────────────────────────────────
+def attach(conn, which, db=DB):
+    """ATTACH the archives selected by `which` ('' = none, 'all'/'1', or '2023,2024').
+
+    Returns the schema aliases. SQLite allows only a few attached databases (10
+    by default); asking for more raises ValueError naming the limit rather than
+    quietly reading a subset of the years.
+    """
+    if not which or which == '0': return []
+    years = archived_years(db)
+    if which not in ('1', 'all'):
+        wanted = {y.strip() for y in which.split(',')}
+        years = [y for y in years if y in wanted]
+    limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) if hasattr(conn, 'getlimit') else 10
+    if len(years) > limit:
+        raise ValueError(f'At most {limit} archived years can be read at once ({len(years)} asked for); '
+                         f'list them, e.g. archived={",".join(years[-limit:])}')
+    aliases = []
+    for y in years:
+        conn.execute(f'ATTACH DATABASE ? AS y{y}', (archive_path(y, db),))
+        aliases.append(f'y{y}')
+    return aliases
+
+def source(conn, table, aliases):
+    """FROM-clause source for table: the table itself, or a UNION ALL over archives."""
+    if not aliases: return table
+    cols  = columns(conn, 'main', table)
+    parts = [f'SELECT {",".join(cols)} FROM main.{table}']
+    for a in aliases:
+        have = set(columns(conn, a, table))
+        if not have: continue
+        parts.append('SELECT ' + ','.join(c if c in have else f'NULL AS {c}' for c in cols)
+                     + f' FROM {a}.{table}')
+    return '(' + ' UNION ALL '.join(parts) + ')'
+
+def sources(conn, which, db=DB):
+    """{table: FROM source} for every archived table, attaching archives as needed."""
+    aliases = attach(conn, which, db)
+    return {t: source(conn, t, aliases) for t in ARCHIVED}
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='Archive closed academic years out of school.db')
+    ap.add_argument('--db', default=DB)
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    sub.add_parser('list', help='list archived years')
+    c = sub.add_parser('close', help='move a closed year into school_<year>.db')
+    c.add_argument('year')
+    c.add_argument('--include-unpaid', action='store_true', help='also move fees not fully paid')
+    c.add_argument('--force', action='store_true', help='allow the current year')
+    a = ap.parse_args(argv)
+
+    if a.cmd == 'list':
+        for y in archived_years(a.db):
+            p = archive_path(y, a.db)
+            print(f'{y}  {p}  {os.path.getsize(p):>12,} bytes')
+    elif a.cmd == 'close':
+        moved = close_year(a.year, a.db, keep_unpaid=not a.include_unpaid, force=a.force)
+        for t, n in moved.items(): print(f'  {t:<13} {n:>8,} rows → {archive_path(a.year, a.db)}')
+
+if __name__ == '__main__':
+    main()
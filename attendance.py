@@ -0,0 +1,204 @@
+"""
+Nyatsime Independent College — attendance store
+Keeps, next to the raw attendance rows:
+  attendance_terms  one row per learner per term: day bitmaps (present, absent,
+                    late; bit n = day n of the term) plus register counters
+  attendance_daily  register counters per date per class
+Both are maintained in the same transaction as every register write, so
+rates, chronic-absentee lists and class heatmaps never scan raw rows.
+Run: python attendance.py rebuild
+"""
+
+import sqlite3, os, re
+from datetime import date
+
+DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'school.db')
+
+# Zimbabwean school terms: Jan–Apr, May–Aug, Sep–Dec (≤ 122 days → 16 bytes)
+TERM_MONTHS = {1: 1, 2: 5, 3: 9}
+TERM_BYTES  = 16
+STATUSES    = ('Present', 'Absent', 'Late')
+CHRONIC     = 0.10   # absent on ≥10% of recorded days
+
+DDL = ['''CREATE TABLE IF NOT EXISTS attendance_terms (
+        learner_id TEXT, term_key TEXT, grade TEXT,
+        present BLOB, absent BLOB, late BLOB,
+        n_present INTEGER DEFAULT 0, n_absent INTEGER DEFAULT 0, n_late INTEGER DEFAULT 0,
+        PRIMARY KEY (learner_id, term_key))''',
+       '''CREATE TABLE IF NOT EXISTS attendance_daily (
+        date TEXT, grade TEXT,
+        present INTEGER DEFAULT 0, absent INTEGER DEFAULT 0, late INTEGER DEFAULT 0,
+        PRIMARY KEY (date, grade))''',
+       'CREATE INDEX IF NOT EXISTS idx_att_terms_term ON attendance_terms(term_key, grade)']
+
+# ── Terms and bitmaps ──────────────────────────────────────
+def term_of(d):
+    """'2026-03-02' → ('2026-T1', day index within the term)."""
+    dt = date.fromisoformat(d[:10])
+    n = 3 if dt.month >= 9 else 2 if dt.month >= 5 else 1
+    return f'{dt.year}-T{n}', (dt - date(dt.year, TERM_MONTHS[n], 1)).days
+
+def term_range(term_key):
+    """('2026-01-01', '2026-04-30') for '2026-T1'."""
+    year, n = int(term_key[:4]), int(term_key[-1])
+    start = date(year, TERM_MONTHS[n], 1)
+    end = date(year + 1, 1, 1) if n == 3 else date(year, TERM_MONTHS[n + 1], 1)
+    return start.isoformat(), date.fromordinal(end.toordinal() - 1).isoformat()
+
+def term_key(qs, today=None):
+    """Term from ?term=2026-T1, or ?term=Term 2&year=2026, else the current term."""
+    t = qs.get('term', [''])[0]
+    if re.match(r'^\d{4}-T[123]$', t): return t
+    m = re.match(r'^Term ([123])$', t)
+    if m:
+        year = qs.get('year', [''])[0]
+        if not re.match(r'^\d{4}$', year): year = str((today or date.today()).year)
+        return f'{year}-T{m.group(1)}'
+    return term_of((today or date.today()).isoformat())[0]
+
+def bits(blob): return int.from_bytes(blob or b'', 'little')
+def blob(n):    return n.to_bytes(TERM_BYTES, 'little')
+def popcount(n): return bin(n).count('1')
+
+# ── Writes ─────────────────────────────────────────────────
+def _count(conn, d, grade, lid, status, delta):
+    if status not in STATUSES: return
+    col = status.lower()
+    conn.execute(f'''INSERT INTO attendance_daily (date,grade,{col}) VALUES (?,?,?)
+        ON CONFLICT(date,grade) DO UPDATE SET {col}={col}+excluded.{col}''', (d, grade, delta))
+    tk = term_of(d)[0]
+    conn.execute(f'''INSERT INTO attendance_terms (learner_id,term_key,grade,n_{col}) VALUES (?,?,?,?)
+        ON CONFLICT(learner_id,term_key) DO UPDATE SET n_{col}=n_{col}+excluded.n_{col}''',
+        (lid, tk, grade, delta))
+
+def _set_day(conn, lid, d, grade):
+    """Recompute one learner-day's bits from that day's registers."""
+    tk, day = term_of(d)
+    seen = {r[0] for r in conn.execute(
+        'SELECT status FROM attendance WHERE learner_id=? AND date=?', (lid, d))}
+    row = conn.execute('SELECT present,absent,late FROM attendance_terms WHERE learner_id=? AND term_key=?',
+                       (lid, tk)).fetchone()
+    maps = [bits(b) for b in row] if row else [0, 0, 0]
+    for i, status in enumerate(STATUSES):
+        maps[i] = maps[i] | (1 << day) if status in seen else maps[i] & ~(1 << day)
+    conn.execute('''INSERT INTO attendance_terms (learner_id,term_key,grade,present,absent,late)
+        VALUES (?,?,?,?,?,?) ON CONFLICT(learner_id,term_key) DO UPDATE SET
+        grade=excluded.grade, present=excluded.present, absent=excluded.absent, late=excluded.late''',
+        (lid, tk, grade, *[blob(m) for m in maps]))
+
+def record(conn, recs):
+    """Insert/replace register rows and update bitmaps and counters. Caller commits.
+    The write lock is taken before the old row is read, so two posts of the same
+    register cannot both apply the same -1/+1. As in rebuild(), a row whose date
+    is not YYYY-MM-DD is stored but left out of the rollups."""
+    if not conn.in_transaction: conn.execute('BEGIN IMMEDIATE')
+    for rec in recs:
+        lid, d, subject = rec['learner_id'], rec['date'], rec.get('subject','')
+        grade, status = rec.get('grade',''), rec['status']
+        old = conn.execute('SELECT status,grade FROM attendance WHERE learner_id=? AND date=? AND subject=?',
+                           (lid, d, subject)).fetchone()
+        conn.execute('''INSERT OR REPLACE INTO attendance
+            (learner_id,date,status,grade,subject,staff_id,reason)
+            VALUES (?,?,?,?,?,?,?)''',
+            (lid, d, status, grade, subject, rec.get('staff_id',''), rec.get('reason','')))
+        try: term_of(d)
+        except (TypeError, ValueError): continue   # not YYYY-MM-DD: kept, but not rolled up
+        if old: _count(conn, d, old[1] or '', lid, old[0], -1)
+        _count(conn, d, grade, lid, status, +1)
+        _set_day(conn, lid, d, grade)
+
+def rebuild(conn):
+    """Recompute both tables from the raw attendance rows.
+    Rows whose date is not ISO (YYYY-MM-DD) cannot be placed in a term; they are
+    counted and reported, not allowed to stop init_db() at boot."""
+    for sql in DDL: conn.execute(sql)
+    conn.execute('DELETE FROM attendance_terms'); conn.execute('DELETE FROM attendance_daily')
+    daily, terms, bad = {}, {}, 0
+    for lid, d, status, grade in conn.execute('SELECT learner_id,date,status,grade FROM attendance'):
+        if status not in STATUSES or not d: continue
+        try: tk, day = term_of(d)
+        except (TypeError, ValueError): bad += 1; continue
+        i = STATUSES.index(status)
+        daily.setdefault((d, grade or ''), [0, 0, 0])[i] += 1
+        t = terms.setdefault((lid, tk), [grade or '', 0, 0, 0, 0, 0, 0])
+        t[0] = grade or t[0]; t[1 + i] |= 1 << day; t[4 + i] += 1
+    conn.executemany('INSERT INTO attendance_daily (date,grade,present,absent,late) VALUES (?,?,?,?,?)',
+                     [(d, g, *c) for (d, g), c in daily.items()])
+    conn.executemany('''INSERT INTO attendance_terms
+        (learner_id,term_key,grade,present,absent,late,n_present,n_absent,n_late) VALUES (?,?,?,?,?,?,?,?,?)''',
+        [(lid, tk, t[0], blob(t[1]), blob(t[2]), blob(t[3]), t[4], t[5], t[6])
+         for (lid, tk), t in terms.items()])
+    if bad: print(f'  attendance: skipped {bad} register row(s) with a date that is not YYYY-MM-DD')
+    return len(terms)
+
+# ── Reads ──────────────────────────────────────────────────
+def day_stats(row):
+    """(recorded days, absent days, late days) from one attendance_terms row.
+    A day counts as absent only if the learner attended no register that day."""
+    p, a, l = bits(row['present']), bits(row['absent']), bits(row['late'])
+    return popcount(p | a | l), popcount(a & ~(p | l)), popcount(l)
+
+def summary(conn, lid, src='attendance_terms'):
+    """{status: registers} for a learner, as /api/report has always returned."""
+    r = conn.execute(f'SELECT SUM(n_present),SUM(n_absent),SUM(n_late) FROM {src} WHERE learner_id=?',
+                     (lid,)).fetchone()
+    return {s: n for s, n in zip(STATUSES, r) if n}
+
+def rates(conn, tk, grade=''):
+    """Per-class register counts and attendance rate for a term, from the daily rollup."""
+    start, end = term_range(tk)
+    q = ('SELECT grade, SUM(present) AS present, SUM(absent) AS absent, SUM(late) AS late, '
+         'COUNT(DISTINCT date) AS days FROM attendance_daily WHERE date BETWEEN ? AND ?')
+    params = [start, end]
+    if grade: q += ' AND grade=?'; params.append(grade)
+    out = []
+    for r in conn.execute(q + ' GROUP BY grade ORDER BY grade', params).fetchall():
+        total = (r['present'] or 0) + (r['absent'] or 0) + (r['late'] or 0)
+        out.append({**dict(r), 'rate': round(((r['present'] or 0) + (r['late'] or 0)) / total, 4) if total else None})
+    return out
+
+def learner_rate(conn, lid, tk):
+    r = conn.execute('SELECT * FROM attendance_terms WHERE learner_id=? AND term_key=?', (lid, tk)).fetchone()
+    if not r: return {'learner_id': lid, 'term': tk, 'days': 0, 'absent_days': 0, 'late_days': 0, 'rate': None}
+    days, absent, late = day_stats(r)
+    return {'learner_id': lid, 'term': tk, 'days': days, 'absent_days': absent, 'late_days': late,
+            'rate': round((days - absent) / days, 4) if days else None}
+
+def chronic(conn, tk, threshold=CHRONIC, grade=''):
+    """Learners absent on at least `threshold` of their recorded days this term."""
+    q = ('SELECT t.*, l.first_name||" "||l.last_name AS learner_name FROM attendance_terms t '
+         'LEFT JOIN learners l ON t.learner_id=l.learner_id WHERE t.term_key=?')
+    params = [tk]
+    if grade: q += ' AND t.grade=?'; params.append(grade)
+    out = []
+    for r in conn.execute(q, params).fetchall():
+        days, absent, late = day_stats(r)
+        if days and absent / days >= threshold:
+            out.append({'learner_id': r['learner_id'], 'learner_name': r['learner_name'], 'grade': r['grade'],
+                        'days': days, 'absent_days': absent, 'late_days': late,
+                        'absence_rate': round(absent / days, 4)})
+    return sorted(out, key=lambda x: -x['absence_rate'])
+
+def heatmap(conn, tk, grade):
+    """Class register grid: recorded dates plus one P/A/L/- string per learner."""
+    start, end = term_range(tk)
+    daily = [dict(r) for r in conn.execute(
+        'SELECT date,present,absent,late FROM attendance_daily WHERE grade=? AND date BETWEEN ? AND ? ORDER BY date',
+        (grade, start, end)).fetchall()]
+    idx = [term_of(d['date'])[1] for d in daily]
+    learners = []
+    for r in conn.execute('SELECT t.*, l.first_name||" "||l.last_name AS learner_name FROM attendance_terms t '
+                          'LEFT JOIN learners l ON t.learner_id=l.learner_id '
+                          'WHERE t.term_key=? AND t.grade=? ORDER BY learner_name', (tk, grade)).fetchall():
+        p, a, l = bits(r['present']), bits(r['absent']), bits(r['late'])
+        cells = ''.join('P' if p >> i & 1 else 'L' if l >> i & 1 else 'A' if a >> i & 1 else '-' for i in idx)
+        learners.append({'learner_id': r['learner_id'], 'learner_name': r['learner_name'], 'cells': cells})
+    return {'term': tk, 'grade': grade, 'days': daily, 'learners': learners}
+
+if __name__ == '__main__':
+    import sys
+    if sys.argv[1:] != ['rebuild']:
+        sys.exit('usage: python attendance.py rebuild')
+    conn = sqlite3.connect(DB)
+    n = rebuild(conn); conn.commit(); conn.close()
+    print(f'Rebuilt attendance bitmaps for {n} learner-terms.')
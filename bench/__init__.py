@@ -0,0 +1,9 @@
+"""
+Nyatsime Independent College — performance benchmarks
+  synth    deterministic synthetic school generator
+  serve    runs app.py / app_backup.py against a chosen database
+  load     replays SPA traffic mixes and reports latency per endpoint
+  startup  import / init_db() / first-response timings after a cold start
+  encode   default vs. columnar JSON encode time and size for /api/marks
+Run: python -m bench --help
+"""
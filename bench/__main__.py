@@ -0,0 +1,127 @@
+"""
+Benchmark CLI.
+
+  python -m bench generate --db /tmp/bench.db --learners 2000
+  python -m bench run --app app_backup --scenario mixed --out before.json
+  python -m bench compare before.json after.json
+  python -m bench startup --app app_backup
+  python -m bench encode --rows 100000
+"""
+
+import argparse, json, os, subprocess, sys, tempfile, time
+from urllib.parse import urlparse
+
+from bench import synth, load, startup, encode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def add_sizes(ap):
+    for k, v in synth.DEFAULTS.items():
+        ap.add_argument('--' + k.replace('_', '-'), type=int, default=None, help=f'default {v}')
+
+def sizes(a):
+    return {k: getattr(a, k) for k in synth.DEFAULTS}
+
+def start_server(app, db, port, workers=1, admission=False):
+    proc = subprocess.Popen([sys.executable, '-m', 'bench.serve', '--app', app, '--db', db,
+                             '--port', str(port), '--workers', str(workers)]
+                            + (['--admission'] if admission else []),
+                            cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith('ready'):
+        proc.kill(); raise RuntimeError(f'{app} did not start')
+    return proc
+
+def cmd_generate(a):
+    t0 = time.perf_counter()
+    counts = synth.generate(a.db, a.app, **sizes(a))
+    print(json.dumps({'db': a.db, 'seconds': round(time.perf_counter() - t0, 2), 'rows': counts}, indent=2))
+
+def cmd_run(a):
+    db = a.db or os.path.join(tempfile.gettempdir(), f'nyatsime-bench-{a.app}.db')
+    if not a.url and (a.regenerate or not os.path.exists(db)):
+        synth.generate(db, a.app, **sizes(a))
+    proc = None
+    if a.url:
+        u = urlparse(a.url); host, port = u.hostname, u.port or 80
+    else:
+        host, port = '127.0.0.1', a.port
+        proc = start_server(a.app, db, port, a.workers, a.admission)
+    try:
+        report = load.run(host, port, load.Dataset(db), a.scenario, a.concurrency, a.duration, a.seed or 1)
+    finally:
+        if proc: proc.terminate(); proc.wait()
+    report['meta']['app'] = a.app
+    report['meta']['workers'] = a.workers
+    report['meta']['admission'] = a.admission
+    out = json.dumps(report, indent=2)
+    if a.out:
+        with open(a.out, 'w') as f: f.write(out + '\n')
+    print(out)
+
+def cmd_compare(a):
+    old, new = (json.load(open(p)) for p in (a.before, a.after))
+    print(f"{'endpoint':<32}{'p50 ms':>18}{'p95 ms':>18}{'p99 ms':>18}{'req/s':>18}")
+    for name in sorted(set(old['endpoints']) | set(new['endpoints'])) + ['total']:
+        o = old['total'] if name == 'total' else old['endpoints'].get(name)
+        n = new['total'] if name == 'total' else new['endpoints'].get(name)
+        if not o or not n: print(f'{name:<32}  (only in one run)'); continue
+        cells = []
+        for k in ('p50_ms', 'p95_ms', 'p99_ms', 'rps'):
+            d = (n[k] - o[k]) / o[k] * 100 if o[k] else 0.0
+            cells.append(f'{n[k]:>9.2f} {d:+6.1f}%')
+        print(f'{name:<32}' + ''.join(f'{c:>18}' for c in cells))
+
+def cmd_startup(a):
+    out = json.dumps(startup.run(a.app, a.repeat, a.port), indent=2)
+    if a.out:
+        with open(a.out, 'w') as f: f.write(out + '\n')
+    print(out)
+
+def cmd_encode(a):
+    print(json.dumps(encode.run(a.rows, a.repeat, a.db), indent=2))
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m bench', description='Nyatsime portal benchmarks')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+
+    g = sub.add_parser('generate', help='build a synthetic school database')
+    g.add_argument('--db', required=True)
+    g.add_argument('--app', default='app_backup', help='schema to use: app or app_backup')
+    add_sizes(g)
+
+    r = sub.add_parser('run', help='replay a traffic mix and print latency JSON')
+    r.add_argument('--app', default='app_backup')
+    r.add_argument('--db', help='database to serve (generated if missing)')
+    r.add_argument('--regenerate', action='store_true')
+    r.add_argument('--url', help='drive an already running server instead of starting one')
+    r.add_argument('--port', type=int, default=5055)
+    r.add_argument('--workers', type=int, default=1, help='serve with N prefork workers')
+    r.add_argument('--admission', action='store_true',
+                   help='leave admission control on (all virtual users share 127.0.0.1)')
+    r.add_argument('--scenario', default='mixed', choices=['mixed'] + sorted(load.SCENARIOS))
+    r.add_argument('--concurrency', type=int, default=8)
+    r.add_argument('--duration', type=float, default=10.0, help='seconds')
+    r.add_argument('--out', help='also write the JSON report here')
+    add_sizes(r)
+
+    c = sub.add_parser('compare', help='compare two run reports')
+    c.add_argument('before'); c.add_argument('after')
+
+    s = sub.add_parser('startup', help='time import, init_db() and first response after boot')
+    s.add_argument('--app', default='app_backup')
+    s.add_argument('--repeat', type=int, default=10)
+    s.add_argument('--port', type=int, default=5056)
+    s.add_argument('--out')
+
+    e = sub.add_parser('encode', help='time default vs columnar JSON on the /api/marks result')
+    e.add_argument('--rows', type=int, default=100_000)
+    e.add_argument('--repeat', type=int, default=5)
+    e.add_argument('--db', help='marks database to use (generated if missing)')
+
+    a = ap.parse_args(argv)
+    {'generate': cmd_generate, 'run': cmd_run, 'compare': cmd_compare,
+     'startup': cmd_startup, 'encode': cmd_encode}[a.cmd](a)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Encode benchmark: the default list-of-dicts JSON vs. the columnar format
+({columns, rows}) on the GET /api/marks result set, timing fetch + encode
+and comparing body sizes (raw and gzipped).
+"""
+
+import gzip, json, os, sqlite3, statistics, tempfile, time
+
+from bench import synth
+
+# Same query GET /api/marks runs in app_backup.py
+MARKS_SQL = ('SELECT m.*, s.first_name||" "||s.last_name AS teacher_name,'
+             'l.first_name||" "||l.last_name AS learner_name '
+             'FROM marks m '
+             'LEFT JOIN staff    s ON m.staff_id   = s.staff_id '
+             'LEFT JOIN learners l ON m.learner_id = l.learner_id '
+             'ORDER BY m.date_entered DESC')
+
+def dicts(conn):
+    conn.row_factory = sqlite3.Row
+    return json.dumps([dict(r) for r in conn.execute(MARKS_SQL).fetchall()], default=str).encode()
+
+def columnar(conn):
+    conn.row_factory = None
+    cur = conn.execute(MARKS_SQL)
+    return json.dumps({'columns': [d[0] for d in cur.description], 'rows': cur.fetchall()},
+                      default=str).encode()
+
+def timed(fn, conn, repeat):
+    times, body = [], b''
+    for _ in range(repeat):
+        t = time.perf_counter(); body = fn(conn); times.append((time.perf_counter() - t) * 1000)
+    return statistics.median(times), body
+
+def run(rows=100_000, repeat=5, db=None):
+    per_learner = 3 * 6 * 4   # terms × subjects × marks per subject (synth defaults)
+    db = db or os.path.join(tempfile.gettempdir(), f'nyatsime-encode-{rows}.db')
+    if not os.path.exists(db):
+        synth.generate(db, learners=-(-rows // per_learner), attendance_days=1, fees_per_term=0)
+    conn = sqlite3.connect(db)
+    report = {'rows': conn.execute('SELECT COUNT(*) FROM marks').fetchone()[0], 'repeat': repeat}
+    for name, fn in (('dicts', dicts), ('columnar', columnar)):
+        ms, body = timed(fn, conn, repeat)
+        report[name] = {'fetch_encode_ms': round(ms, 1), 'bytes': len(body),
+                        'gzip_bytes': len(gzip.compress(body, 6))}
+    conn.close()
+    d, c = report['dicts'], report['columnar']
+    report['columnar_vs_dicts'] = {k: f'{(c[k] - d[k]) / d[k] * 100:+.1f}%'
+                                   for k in ('fetch_encode_ms', 'bytes', 'gzip_bytes')}
+    return report
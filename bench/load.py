@@ -0,0 +1,151 @@
+"""
+Load driver: replays the request sequences the SPA makes for common school
+moments and records latency per endpoint.
+
+  login_storm  a class of learners logging in and opening their home page
+  register     teachers taking a class register
+  marks_entry  teachers entering a class's marks
+  marks_burst  marks week: only single-mark POSTs, so concurrent ones share commits
+  marks_grid   a whole class's scores for one assessment in one POST /api/marks/grid
+  reports      printing report cards
+  mixed        weighted blend of the above
+"""
+
+import http.client, json, random, sqlite3, threading, time, subprocess, os
+from urllib.parse import quote
+
+from bench.synth import LEARNER_PASSWORD, STAFF_PASSWORD, TERMS
+
+MIXED = [('login_storm', 4), ('register', 2), ('marks_entry', 3), ('reports', 1)]
+
+class Dataset:
+    """Ids the scenarios pick from, read from the benchmark database."""
+    def __init__(self, db):
+        conn = sqlite3.connect(db)
+        q = lambda sql: conn.execute(sql).fetchall()
+        self.learners = q('SELECT learner_id,email,grade FROM learners')
+        self.staff    = q('SELECT staff_id,email,subject FROM staff')
+        self.grades   = sorted({l[2] for l in self.learners if l[2]})
+        self.by_grade = {}
+        for l in self.learners: self.by_grade.setdefault(l[2], []).append(l[0])
+        conn.close()
+
+# ── Scenarios: each yields (method, path, body, label) ─────
+def login_storm(rng, ds):
+    lid, email, _ = rng.choice(ds.learners)
+    yield 'POST', '/api/learner/login', {'email': email, 'password': LEARNER_PASSWORD}, 'POST /api/learner/login'
+    yield 'GET', f'/api/marks?learner_id={lid}', None, 'GET /api/marks?learner_id'
+    yield 'GET', f'/api/fees?learner_id={lid}',  None, 'GET /api/fees?learner_id'
+    yield 'GET', '/api/notices?audience=Learner', None, 'GET /api/notices'
+
+def register(rng, ds):
+    sid, email, subject = rng.choice(ds.staff)
+    grade = rng.choice(ds.grades)
+    day = f'2026-{rng.randint(1,12):02d}-{rng.randint(1,28):02d}'
+    yield 'POST', '/api/staff/login', {'email': email, 'password': STAFF_PASSWORD}, 'POST /api/staff/login'
+    yield 'GET', '/api/learners', None, 'GET /api/learners'
+    yield 'GET', f'/api/learners?grade={quote(grade)}', None, 'GET /api/learners?grade'
+    yield 'POST', '/api/attendance', [
+        {'learner_id': lid, 'date': day, 'subject': subject, 'grade': grade, 'staff_id': sid,
+         'status': rng.choice(['Present']*8 + ['Absent', 'Late']), 'reason': ''}
+        for lid in ds.by_grade[grade]], 'POST /api/attendance'
+    yield 'GET', '/api/attendance', None, 'GET /api/attendance'
+
+def marks_entry(rng, ds):
+    sid, email, subject = rng.choice(ds.staff)
+    grade = rng.choice(ds.grades)
+    yield 'POST', '/api/staff/login', {'email': email, 'password': STAFF_PASSWORD}, 'POST /api/staff/login'
+    yield 'GET', '/api/learners', None, 'GET /api/learners'
+    yield 'GET', '/api/marks', None, 'GET /api/marks'
+    for lid in rng.sample(ds.by_grade[grade], min(10, len(ds.by_grade[grade]))):
+        yield 'POST', '/api/marks', {'learner_id': lid, 'staff_id': sid, 'subject': subject,
+            'assessment_type': 'Bench Test', 'term': rng.choice(TERMS), 'grade': grade,
+            'score': rng.randint(30, 100), 'max_score': 100, 'comment': ''}, 'POST /api/marks'
+
+def marks_burst(rng, ds):
+    sid, _, subject = rng.choice(ds.staff)
+    grade = rng.choice(ds.grades)
+    for lid in ds.by_grade[grade]:
+        yield 'POST', '/api/marks', {'learner_id': lid, 'staff_id': sid, 'subject': subject,
+            'assessment_type': 'Bench Test', 'term': rng.choice(TERMS), 'grade': grade,
+            'score': rng.randint(30, 100), 'max_score': 100, 'comment': ''}, 'POST /api/marks'
+
+def marks_grid(rng, ds):
+    sid, email, subject = rng.choice(ds.staff)
+    grade = rng.choice(ds.grades)
+    yield 'POST', '/api/staff/login', {'email': email, 'password': STAFF_PASSWORD}, 'POST /api/staff/login'
+    yield 'GET', f'/api/learners?grade={quote(grade)}', None, 'GET /api/learners?grade'
+    yield 'POST', '/api/marks/grid', {'staff_id': sid, 'subject': subject, 'assessment_type': 'Bench Test',
+        'term': rng.choice(TERMS), 'grade': grade, 'max_score': 100,
+        'scores': {lid: rng.randint(30, 100) for lid in ds.by_grade[grade]}}, 'POST /api/marks/grid'
+
+def reports(rng, ds):
+    yield 'GET', '/api/learners', None, 'GET /api/learners'
+    for _ in range(3):
+        lid = rng.choice(ds.learners)[0]
+        yield 'GET', f'/api/report/{lid}?term={quote(rng.choice(TERMS))}', None, 'GET /api/report/<id>'
+
+SCENARIOS = {'login_storm': login_storm, 'register': register,
+             'marks_entry': marks_entry, 'marks_burst': marks_burst,
+             'marks_grid': marks_grid, 'reports': reports}
+
+def pick(rng, scenario):
+    if scenario != 'mixed': return SCENARIOS[scenario]
+    names, weights = zip(*MIXED)
+    return SCENARIOS[rng.choices(names, weights)[0]]
+
+# ── Driver ─────────────────────────────────────────────────
+def percentile(sorted_vals, p):
+    if not sorted_vals: return 0.0
+    k = max(0, min(len(sorted_vals) - 1, int(round(p / 100 * len(sorted_vals) + .5)) - 1))
+    return sorted_vals[k]
+
+def summarize(samples, elapsed):
+    lat = sorted(ms for ms, _ in samples)
+    return {'count': len(lat), 'errors': sum(1 for _, ok in samples if not ok),
+            'rps': round(len(lat) / elapsed, 2) if elapsed else 0.0,
+            'mean_ms': round(sum(lat) / len(lat), 3) if lat else 0.0,
+            'p50_ms': round(percentile(lat, 50), 3), 'p95_ms': round(percentile(lat, 95), 3),
+            'p99_ms': round(percentile(lat, 99), 3), 'max_ms': round(lat[-1], 3) if lat else 0.0}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        return ''
+
+def run(host, port, ds, scenario='mixed', concurrency=8, duration=10.0, seed=1):
+    """Run `concurrency` virtual users for `duration` seconds; returns the report dict."""
+    results, lock = {}, threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def user(n):
+        rng = random.Random(seed * 1000 + n)
+        local = {}
+        while time.perf_counter() < deadline:
+            for method, path, body, label in pick(rng, scenario)(rng, ds):
+                data = json.dumps(body).encode() if body is not None else None
+                t0 = time.perf_counter()
+                try:
+                    c = http.client.HTTPConnection(host, port, timeout=30)
+                    c.request(method, path, body=data, headers={'Content-Type': 'application/json'} if data else {})
+                    r = c.getresponse(); r.read(); c.close()
+                    ok = r.status < 400
+                except OSError:
+                    ok = False
+                local.setdefault(label, []).append(((time.perf_counter() - t0) * 1000, ok))
+        with lock:
+            for k, v in local.items(): results.setdefault(k, []).extend(v)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(concurrency)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - t0
+    every = [s for v in results.values() for s in v]
+    return {'meta': {'commit': git_commit(), 'scenario': scenario, 'concurrency': concurrency,
+                     'duration_s': round(elapsed, 3), 'seed': seed,
+                     'learners': len(ds.learners), 'staff': len(ds.staff)},
+            'total': summarize(every, elapsed),
+            'endpoints': {k: summarize(v, elapsed) for k, v in sorted(results.items())}}
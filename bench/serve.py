@@ -0,0 +1,36 @@
+"""
+Run one of the portal servers against a benchmark database.
+Uses the app's own threaded server. Admission control is off unless
+--admission is given: every virtual user comes from 127.0.0.1, so the per-IP
+buckets would measure the rate limiter instead of the server.
+Run: python -m bench.serve --app app_backup --db /tmp/bench.db --port 5055
+"""
+
+import argparse, importlib, sys
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Serve a portal app on a given database')
+    ap.add_argument('--app',  default='app_backup')
+    ap.add_argument('--db',   required=True)
+    ap.add_argument('--port', type=int, default=5055)
+    ap.add_argument('--init', action='store_true', help='run init_db() first, as the app does on boot')
+    ap.add_argument('--workers', type=int, default=1, help='prefork worker processes')
+    ap.add_argument('--admission', action='store_true', help='keep rate limits and load shedding on')
+    a = ap.parse_args(argv)
+    mod = importlib.import_module(a.app)
+    mod.DB = a.db
+    if a.init: mod.init_db()
+    import admission
+    admission.ENABLED = a.admission
+    server = admission.Server(('127.0.0.1', a.port), mod.Handler)
+    print(f'ready {a.port}', flush=True)
+    if a.workers > 1:
+        import prefork
+        return prefork.serve(server, a.workers, db=a.db)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    sys.exit(main())
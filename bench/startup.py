@@ -0,0 +1,54 @@
+"""
+Startup-time benchmark: module import, init_db() on a new vs. an up-to-date
+database, and process start → first response, as seen after a cold start.
+"""
+
+import http.client, importlib, os, statistics, subprocess, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_time(app):
+    code = f'import time; t=time.perf_counter(); import {app}; print(time.perf_counter()-t)'
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(out.stdout) * 1000
+
+def init_time(app, db, fresh):
+    mod = importlib.import_module(app)
+    mod.DB = db
+    if fresh:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db + suffix): os.remove(db + suffix)
+    t = time.perf_counter(); mod.init_db()
+    return (time.perf_counter() - t) * 1000
+
+def first_byte(app, db, port):
+    t = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-m', 'bench.serve', '--app', app, '--db', db,
+                             '--port', str(port), '--init'], cwd=ROOT, stdout=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                c = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+                c.request('GET', '/api/stats'); c.getresponse().read(); c.close()
+                return (time.perf_counter() - t) * 1000
+            except OSError:
+                if proc.poll() is not None: raise RuntimeError(f'{app} exited during startup')
+                time.sleep(0.002)
+    finally:
+        proc.terminate(); proc.wait()
+
+def run(app='app_backup', repeat=10, port=5056):
+    db = os.path.join(tempfile.gettempdir(), f'nyatsime-startup-{app}.db')
+    med = lambda xs: round(statistics.median(xs), 3)
+    report = {'app': app, 'repeat': repeat,
+              'import_ms':       med([import_time(app) for _ in range(repeat)]),
+              'init_db_new_ms':  med([init_time(app, db, True) for _ in range(repeat)]),
+              'init_db_warm_ms': med([init_time(app, db, False) for _ in range(repeat)])}
+    fresh = []
+    for _ in range(repeat):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db + suffix): os.remove(db + suffix)
+        fresh.append(first_byte(app, db, port))
+    report['first_byte_new_db_ms']  = med(fresh)
+    report['first_byte_warm_db_ms'] = med([first_byte(app, db, port) for _ in range(repeat)])
+    return report
@@ -0,0 +1,155 @@
+"""
+Deterministic synthetic school: same seed + sizes → byte-identical data.
+Rows are only written to tables and columns the target app's schema has,
+so the generator works for both app.py and app_backup.py.
+"""
+
+import sqlite3, hashlib, random, importlib, os
+from datetime import date, timedelta
+
+GRADES   = ['Form 1A','Form 1B','Form 2A','Form 2B','Form 3A','Form 3B',
+            'Form 4A','Form 4B','Form 5','Form 6 Lower','Form 6 Upper','Grade 7A','Grade 7B']
+SUBJECTS = ['Mathematics','English','Shona','Physics','Chemistry','Biology',
+            'Geography','History','Accounting','Computer Science']
+TERMS    = ['Term 1','Term 2','Term 3']
+ASSESS   = ['Test','Assignment','Quiz','Exam']
+FIRST    = ['Tendai','Rutendo','Tatenda','Nyasha','Farai','Chipo','Kudzai','Tafadzwa',
+            'Amahle','Sipho','Thandiwe','Blessing','Tinashe','Rudo','Simba','Vimbai']
+LAST     = ['Moyo','Ncube','Dube','Sibanda','Mpofu','Chikwanha','Mutasa','Khumalo',
+            'Dlamini','Ndlovu','Gumbo','Mlambo','Zhou','Marufu','Chiweshe','Banda']
+
+LEARNER_PASSWORD = 'learner123'
+STAFF_PASSWORD   = 'teacher123'
+
+DEFAULTS = dict(learners=500, staff=40, terms=3, marks_per_subject=4,
+                subjects_per_learner=6, attendance_days=60, fees_per_term=1,
+                books=200, seed=1, year=2026)
+
+def sha(pw): return hashlib.sha256(pw.encode()).hexdigest()
+
+def school_days(year, n):
+    d, out = date(year, 1, 13), []
+    while len(out) < n:
+        if d.weekday() < 5: out.append(d.isoformat())
+        d += timedelta(days=1)
+    return out
+
+class Writer:
+    """Inserts dict rows, dropping columns (or whole tables) the schema lacks."""
+    def __init__(self, conn):
+        self.conn, self.cols = conn, {}
+        for (t,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'"):
+            self.cols[t] = [r[1] for r in conn.execute(f'PRAGMA table_info({t})')]
+        self.counts = {}
+
+    def insert(self, table, rows):
+        if table not in self.cols: return 0
+        rows = list(rows)
+        if not rows: return 0
+        keys = [k for k in rows[0] if k in self.cols[table]]
+        self.conn.executemany(
+            f'INSERT OR IGNORE INTO {table} ({",".join(keys)}) VALUES ({",".join("?"*len(keys))})',
+            ([r[k] for k in keys] for r in rows))
+        self.counts[table] = self.counts.get(table, 0) + len(rows)
+        return len(rows)
+
+def generate(db, app='app_backup', **sizes):
+    """Create db with the app's schema and fill it. Returns {table: rows}."""
+    cfg = dict(DEFAULTS, **{k: v for k, v in sizes.items() if v is not None})
+    rng = random.Random(cfg['seed'])
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db + suffix): os.remove(db + suffix)
+    mod = importlib.import_module(app)
+    mod.DB = db; mod.init_db()
+    conn = sqlite3.connect(db)
+    conn.execute('PRAGMA synchronous=OFF')
+    w = Writer(conn)
+    year = cfg['year']
+    terms = TERMS[:cfg['terms']]
+
+    staff_pw = sha(STAFF_PASSWORD)
+    staff = []
+    for i in range(cfg['staff']):
+        subj = SUBJECTS[i % len(SUBJECTS)]
+        staff.append(dict(staff_id=f'BST-{i+1:04d}', first_name=rng.choice(FIRST),
+            last_name=rng.choice(LAST), email=f'bench.staff{i+1}@nyatsimestaff.ac.zw',
+            password=staff_pw, subject=subj, classes_taught=', '.join(rng.sample(GRADES, 3)),
+            role='Admin' if i == 0 else 'Teacher', date_employed=f'{year-5}-01-10',
+            phone=f'077{rng.randrange(10**7):07d}', gender=rng.choice(['Male','Female']),
+            status='Active', approved=1))
+    w.insert('staff', staff)
+    by_subject = {}
+    for s in staff: by_subject.setdefault(s['subject'], []).append(s['staff_id'])
+
+    learner_pw = sha(LEARNER_PASSWORD)
+    learners = []
+    for i in range(cfg['learners']):
+        learners.append(dict(learner_id=f'BLN-{i+1:05d}', first_name=rng.choice(FIRST),
+            last_name=rng.choice(LAST), email=f'bench.learner{i+1}@nyatsimestudent.ac.zw',
+            password=learner_pw, grade=GRADES[i % len(GRADES)],
+            gender=rng.choice(['Male','Female']), phone=f'078{rng.randrange(10**7):07d}',
+            date_of_birth=f'{year-rng.randint(12,19)}-{rng.randint(1,12):02d}-{rng.randint(1,28):02d}',
+            approved=1, fees_blocked=0, status='Active'))
+    w.insert('learners', learners)
+
+    term_start = {t: date(year, 1 + 4*k, 15) for k, t in enumerate(terms)}
+    marks = []
+    for l in learners:
+        subjects = rng.sample(SUBJECTS, min(cfg['subjects_per_learner'], len(SUBJECTS)))
+        for t in terms:
+            for subj in subjects:
+                teacher = rng.choice(by_subject.get(subj) or [staff[0]['staff_id']])
+                for k in range(cfg['marks_per_subject']):
+                    when = term_start[t] + timedelta(days=7*k + rng.randrange(5))
+                    marks.append(dict(learner_id=l['learner_id'], staff_id=teacher, subject=subj,
+                        assessment_type=f'{ASSESS[k % len(ASSESS)]} {k//len(ASSESS)+1}',
+                        grade=l['grade'], term=t, score=rng.randint(25, 100), max_score=100,
+                        comment='', date_entered=f'{when.isoformat()} 10:{rng.randrange(60):02d}:00'))
+        if len(marks) > 50000: w.insert('marks', marks); marks = []
+    w.insert('marks', marks)
+
+    att = []
+    for d in school_days(year, cfg['attendance_days']):
+        for l in learners:
+            r = rng.random()
+            att.append(dict(learner_id=l['learner_id'], date=d, grade=l['grade'], subject='Register',
+                status='Present' if r < .88 else 'Late' if r < .94 else 'Absent',
+                staff_id=staff[0]['staff_id'], reason=''))
+        if len(att) > 50000: w.insert('attendance', att); att = []
+    w.insert('attendance', att)
+
+    fees, pays, n = [], [], 0
+    for l in learners:
+        for t in terms:
+            for k in range(cfg['fees_per_term']):
+                n += 1
+                amount = 450.0 if k == 0 else 50.0
+                paid = rng.choice([0, amount/2, amount, amount])
+                fid = f'BFE-{n:06d}'
+                fees.append(dict(fee_id=fid, learner_id=l['learner_id'], description=f'{t} Fees',
+                    amount=amount, paid=paid, due_date=term_start[t].isoformat(), term=t,
+                    academic_year=str(year), status='Paid' if paid >= amount else 'Partial' if paid else 'Unpaid',
+                    date_created=f'{term_start[t].isoformat()} 08:00:00'))
+                if paid:
+                    pays.append(dict(payment_id=f'BPY-{n:06d}', fee_id=fid, learner_id=l['learner_id'],
+                        amount=paid, payment_method=rng.choice(['Cash','EcoCash','Bank Transfer']),
+                        reference='', received_by=staff[0]['staff_id'],
+                        date_paid=f'{term_start[t].isoformat()} 09:00:00', notes=''))
+    w.insert('fees', fees); w.insert('fee_payments', pays)
+
+    books = [dict(book_id=f'BBK-{i+1:04d}', title=f'{rng.choice(SUBJECTS)} Book {i+1}',
+                  subject=rng.choice(SUBJECTS), grade_level=rng.choice(GRADES), author=rng.choice(LAST),
+                  total_copies=rng.randint(5, 60), copies_issued=0) for i in range(cfg['books'])]
+    w.insert('textbooks', books)
+
+    w.insert('timetable', [dict(grade=g, day=day, period=p, subject=rng.choice(SUBJECTS),
+                                staff_id=rng.choice(staff)['staff_id'], room=f'R{rng.randint(1,30)}',
+                                start_time=f'{6+p:02d}:30', end_time=f'{7+p:02d}:20')
+                           for g in GRADES for day in ['Monday','Tuesday','Wednesday','Thursday','Friday']
+                           for p in range(1, 8)])
+    # Rows went in behind the API's back, so build the rollups POST /api/attendance keeps.
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name='attendance_terms'").fetchone():
+        import attendance
+        w.counts['attendance_terms'] = attendance.rebuild(conn)
+    conn.commit(); conn.close()
+    return w.counts
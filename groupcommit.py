@@ -0,0 +1,94 @@
+"""
+Nyatsime Independent College — group commit
+Handlers hand their INSERTs to one writer thread per process instead of
+committing themselves. The writer takes whatever has queued up (waiting at most
+WINDOW_MS for company), runs each request in its own savepoint and commits the
+lot with a single fsync. submit() returns only after that commit, so a success
+reply still means the mark is on disk.
+"""
+
+import os, queue, sqlite3, threading, time
+
+WINDOW_MS = float(os.environ.get('WRITE_WINDOW_MS', 5))   # longest a write waits for a batch
+MAX_BATCH = int(os.environ.get('WRITE_BATCH', 256))       # requests per commit
+TIMEOUT   = 30.0                                          # seconds a handler waits for its ack
+
+class Job:
+    __slots__ = ('stmts', 'done', 'ids', 'error', 'state')
+    def __init__(self, stmts):
+        self.stmts, self.done, self.ids, self.error = stmts, threading.Event(), None, None
+        self.state = 'queued'   # → 'claimed' by the writer, or 'abandoned' by a timed-out caller
+
+class Writer(threading.Thread):
+    def __init__(self, db, window_ms=WINDOW_MS, max_batch=MAX_BATCH):
+        super().__init__(daemon=True, name='group-commit')
+        self.db, self.window, self.max_batch = db, window_ms / 1000, max_batch
+        self.q, self.lock = queue.Queue(), threading.Lock()
+        self.batches = self.writes = 0
+
+    def submit(self, stmts, timeout=TIMEOUT):
+        """Run [(sql, params), ...] as one all-or-nothing unit; returns lastrowids once durable.
+
+        A caller that gives up withdraws its job, so an error reply never hides a
+        write that is committed later (and duplicated when the user retries). A job
+        the writer has already claimed is waited for, since its outcome is moments away.
+        """
+        job = Job(stmts); self.q.put(job)
+        if not job.done.wait(timeout):
+            with self.lock:
+                if job.state == 'queued':
+                    job.state = 'abandoned'
+                    raise TimeoutError('write was not committed in time; nothing was saved')
+            job.done.wait()
+        if job.error: raise job.error
+        return job.ids
+
+    def run(self):
+        conn = sqlite3.connect(self.db, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA foreign_keys = ON')
+        while True:
+            batch = [self.q.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                try: batch.append(self.q.get_nowait()); continue
+                except queue.Empty: pass
+                left = deadline - time.monotonic()
+                if left <= 0: break
+                try: batch.append(self.q.get(timeout=left))
+                except queue.Empty: break
+            self.commit(conn, batch)
+
+    def commit(self, conn, batch):
+        with self.lock:
+            batch = [job for job in batch if job.state == 'queued']
+            for job in batch: job.state = 'claimed'
+        if not batch: return
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for job in batch:
+                conn.execute('SAVEPOINT job')
+                try:
+                    job.ids = [conn.execute(sql, params).lastrowid for sql, params in job.stmts]
+                except Exception as e:
+                    conn.execute('ROLLBACK TO job'); job.error = e
+                conn.execute('RELEASE job')
+            conn.execute('COMMIT')
+            self.batches += 1; self.writes += len(batch)
+        except Exception as e:
+            if conn.in_transaction: conn.execute('ROLLBACK')
+            for job in batch: job.error = job.error or e
+        finally:
+            for job in batch: job.done.set()
+
+_lock, _writers = threading.Lock(), {}
+
+def writer(db):
+    """This process's writer for db, started on first use (so it survives --workers forks)."""
+    with _lock:
+        w = _writers.get(db)
+        if not w or not w.is_alive():
+            w = _writers[db] = Writer(db); w.start()
+        return w
+
+def submit(db, stmts, timeout=TIMEOUT):
+    return writer(db).submit(stmts, timeout)
@@ -0,0 +1,137 @@
+"""
+Nyatsime Independent College — library circulation
+Issues and returns run as single write transactions that move the book_issues
+row and textbooks.copies_issued together, so the counter cannot drift when
+requests race or fail halfway. Open issues are indexed by due date for the
+overdue list, and a background job recomputes the counters in one statement.
+Run: python library.py reconcile
+"""
+
+import sqlite3, os, threading
+from datetime import date
+
+DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'school.db')
+
+# Partial indexes cover only books still out, so they stay small as history grows.
+DDL = ['CREATE INDEX IF NOT EXISTS idx_issues_open_due ON book_issues(due_date) WHERE date_returned IS NULL',
+       'CREATE INDEX IF NOT EXISTS idx_issues_open_book ON book_issues(book_id) WHERE date_returned IS NULL']
+
+OPEN_COUNT = ('SELECT COUNT(*) FROM book_issues bi '
+              'WHERE bi.book_id=textbooks.book_id AND bi.date_returned IS NULL')
+
+class CirculationError(Exception):
+    def __init__(self, message, code=400):
+        super().__init__(message); self.code = code
+
+# ── Transactions ───────────────────────────────────────────
+def issue(conn, body, new_id):
+    """Lend one copy. Returns the new issue_id; commits or rolls back."""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        book = conn.execute('SELECT title FROM textbooks WHERE book_id=?', (body['book_id'],)).fetchone()
+        if not book: raise CirculationError('Book not found', 404)
+        if not conn.execute('SELECT 1 FROM learners WHERE learner_id=?', (body['learner_id'],)).fetchone():
+            raise CirculationError('Learner not found', 404)
+        taken = conn.execute('''UPDATE textbooks SET copies_issued=COALESCE(copies_issued,0)+1
+            WHERE book_id=? AND COALESCE(copies_issued,0) < COALESCE(total_copies,0)''', (body['book_id'],))
+        if not taken.rowcount: raise CirculationError(f'No copies of {book[0]} available', 409)
+        iid = new_id('ISS', 'book_issues', conn)
+        conn.execute('''INSERT INTO book_issues
+            (issue_id,book_id,learner_id,issued_by,due_date,condition_out,notes)
+            VALUES (?,?,?,?,?,?,?)''',
+            (iid, body['book_id'], body['learner_id'], body.get('issued_by',''),
+             body.get('due_date',''), body.get('condition_out','Good'), body.get('notes','')))
+        conn.commit()
+        return iid
+    except BaseException:
+        conn.rollback(); raise
+
+def return_book(conn, iid, condition_in='Good', today=None):
+    """Close an open issue and free its copy; a second return is refused."""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute('SELECT book_id, date_returned FROM book_issues WHERE issue_id=?', (iid,)).fetchone()
+        if not row: raise CirculationError('Not found', 404)
+        closed = conn.execute('''UPDATE book_issues SET date_returned=?,condition_in=?
+            WHERE issue_id=? AND date_returned IS NULL''',
+            ((today or date.today()).isoformat(), condition_in, iid))
+        if not closed.rowcount: raise CirculationError(f'{iid} was already returned on {row[1]}', 409)
+        conn.execute('UPDATE textbooks SET copies_issued=MAX(0,copies_issued-1) WHERE book_id=?', (row[0],))
+        conn.commit()
+    except BaseException:
+        conn.rollback(); raise
+
+# ── Reads ──────────────────────────────────────────────────
+def overdue(conn, today=None, learner_id='', grade=''):
+    """Open issues past their due date, oldest first (served by idx_issues_open_due)."""
+    today = (today or date.today()).isoformat()
+    q = ('SELECT bi.issue_id, bi.book_id, t.title AS book_title, bi.learner_id, '
+         'l.first_name||" "||l.last_name AS learner_name, l.grade, bi.date_issued, bi.due_date, '
+         'CAST(julianday(?) - julianday(bi.due_date) AS INTEGER) AS days_overdue '
+         'FROM book_issues bi LEFT JOIN textbooks t ON bi.book_id=t.book_id '
+         'LEFT JOIN learners l ON bi.learner_id=l.learner_id '
+         "WHERE bi.date_returned IS NULL AND bi.due_date > '' AND bi.due_date < ?")
+    params = [today, today]
+    if learner_id: q += ' AND bi.learner_id=?'; params.append(learner_id)
+    if grade:      q += ' AND l.grade=?';       params.append(grade)
+    return conn.execute(q + ' ORDER BY bi.due_date', params)
+
+def availability(conn, book_id='', subject='', grade_level=''):
+    """Copies on the shelf per title, from the maintained counter."""
+    q = ('SELECT book_id, title, subject, grade_level, COALESCE(total_copies,0) AS total_copies, '
+         'COALESCE(copies_issued,0) AS copies_issued, '
+         'MAX(0, COALESCE(total_copies,0) - COALESCE(copies_issued,0)) AS available, '
+         '(SELECT MIN(due_date) FROM book_issues bi WHERE bi.book_id=textbooks.book_id '
+         "AND bi.date_returned IS NULL AND bi.due_date > '') AS next_due "
+         'FROM textbooks WHERE 1=1')
+    params = []
+    if book_id:     q += ' AND book_id=?';     params.append(book_id)
+    if subject:     q += ' AND subject=?';     params.append(subject)
+    if grade_level: q += ' AND grade_level=?'; params.append(grade_level)
+    return conn.execute(q + ' ORDER BY title', params)
+
+# ── Reconciliation ─────────────────────────────────────────
+def reconcile(conn):
+    """Reset every copies_issued to its count of open issues. Returns titles fixed."""
+    for sql in DDL: conn.execute(sql)
+    cur = conn.execute(f'UPDATE textbooks SET copies_issued=({OPEN_COUNT}) '
+                       f'WHERE COALESCE(copies_issued,-1) != ({OPEN_COUNT})')
+    conn.commit()
+    return cur.rowcount
+
+class Reconciler(threading.Thread):
+    """Background thread: reconcile() every `interval` seconds."""
+    def __init__(self, db=DB, interval=3600):
+        super().__init__(daemon=True, name='library-reconcile')
+        self.db, self.interval = db, interval
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                conn = sqlite3.connect(self.db, timeout=30)
+                try:
+                    n = reconcile(conn)
+                    if n: print(f'  library: corrected copies_issued on {n} title(s)')
+                finally: conn.close()
+            except Exception as e:
+                print(f'  library reconcile failed: {e}')
+
+    def stop(self):
+        self.stop_event.set(); self.join()
+
+def start_from_env(db=DB):
+    """Start a Reconciler every LIBRARY_RECONCILE minutes (default 60, 0 = off)."""
+    minutes = float(os.environ.get('LIBRARY_RECONCILE', 60) or 0)
+    if minutes <= 0: return None
+    t = Reconciler(db, interval=minutes*60)
+    t.start()
+    return t
+
+if __name__ == '__main__':
+    import sys
+    if sys.argv[1:] != ['reconcile']:
+        sys.exit('usage: python library.py reconcile')
+    conn = sqlite3.connect(DB)
+    n = reconcile(conn); conn.close()
+    print(f'Corrected copies_issued on {n} title(s).')
@@ -0,0 +1,98 @@
+"""
+Nyatsime Independent College — prefork mode
+The supervisor binds the port once and forks N workers that all accept on the
+shared socket, so JSON encoding and row conversion run on every core.
+Run: python app.py --workers 4   (or WORKERS=4)
+"""
+
+import os, signal, sqlite3, sys, threading, time
+
+GRACE = 10.0      # seconds workers get to finish in-flight requests on shutdown
+MIN_UPTIME = 1.0  # a worker dying sooner than this counts as a crash loop
+
+def workers_arg(argv=None, default=None):
+    """--workers N from argv, else $WORKERS, else default (1)."""
+    argv = sys.argv[1:] if argv is None else argv
+    if '--workers' in argv:
+        i = argv.index('--workers')
+        if i + 1 < len(argv): return max(1, int(argv[i+1]))
+    return max(1, int(os.environ.get('WORKERS', default or 1)))
+
+def enable_wal(db):
+    """WAL lets one worker write while the others keep reading."""
+    conn = sqlite3.connect(db)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.close()
+
+def _worker(server, index, on_worker):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)   # Ctrl+C is handled by the supervisor
+    signal.signal(signal.SIGTERM,
+                  lambda *a: threading.Thread(target=server.shutdown, daemon=True).start())
+    code = 0
+    try:
+        if on_worker: on_worker(index)
+        server.serve_forever()
+        if hasattr(server, 'drain'): server.drain(GRACE)   # threaded servers: finish in-flight requests
+    except Exception as e:
+        print(f'  worker {index} ({os.getpid()}) failed: {e}', file=sys.stderr); code = 1
+    finally:
+        sys.stdout.flush(); sys.stderr.flush()
+        os._exit(code)
+
+def serve(server, workers, on_worker=None, db=None):
+    """Fork `workers` copies of an already bound server and supervise them.
+
+    Crashed workers are restarted (with back-off if they die straight away).
+    SIGTERM/SIGINT stop accepting, give workers GRACE seconds to finish their
+    current request, then kill stragglers. on_worker(index) runs in each
+    worker after the fork, before it starts serving.
+    """
+    if not hasattr(os, 'fork'):
+        print('  prefork needs fork(); serving in a single process.')
+        if on_worker: on_worker(0)
+        return server.serve_forever()
+    if db: enable_wal(db)
+
+    children, started, delay = {}, {}, [0.0]
+    stopping = []
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0: _worker(server, index, on_worker)
+        children[pid] = index; started[index] = time.monotonic()
+
+    def stop(signum, frame):
+        if stopping: return
+        stopping.append(time.monotonic())
+        for pid in list(children):
+            try: os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError: pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for i in range(workers): spawn(i)
+    print(f'  {workers} workers sharing port {server.server_address[1]} (supervisor {os.getpid()})')
+
+    # Always poll: a blocking waitpid() is resumed after the SIGTERM handler runs,
+    # so the GRACE deadline would only be checked once some worker happened to exit.
+    while children:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            if stopping and time.monotonic() - stopping[0] > GRACE:
+                for p in list(children):
+                    try: os.kill(p, signal.SIGKILL)
+                    except ProcessLookupError: pass
+            time.sleep(0.05); continue
+        index = children.pop(pid)
+        if stopping: continue
+        uptime = time.monotonic() - started[index]
+        delay[0] = min(max(delay[0] * 2, 0.5), 30.0) if uptime < MIN_UPTIME else 0.0
+        print(f'  worker {index} ({pid}) exited with status {status}; restarting'
+              + (f' in {delay[0]:.1f}s' if delay[0] else ''), file=sys.stderr)
+        time.sleep(delay[0])
+        if not stopping: spawn(index)
+    server.server_close()
+    print('\nServer stopped.')
@@ -0,0 +1,286 @@
+"""
+Nyatsime Independent College — online database snapshots
+Copies school.db with the SQLite backup API while the portal keeps serving.
+Run: python snapshot.py snapshot | list | restore <file>
+"""
+
+import sqlite3, os, gzip, shutil, struct, threading, time, glob
+from datetime import datetime
+
+BASE_DIR     = os.path.dirname(os.path.abspath(__file__))
+DB           = os.path.join(BASE_DIR, 'school.db')
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', os.path.join(BASE_DIR, 'snapshots'))
+
+STEP_PAGES = 256     # pages copied per backup step
+STEP_PAUSE = 0.005   # seconds yielded to request threads between steps
+
+WAL_HEADER = 32
+FRAME_HEAD = 24
+
+def stamp():
+    return datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+
+def journal_mode(conn):
+    return conn.execute('PRAGMA journal_mode').fetchone()[0].lower()
+
+def use_wal(conn):
+    """Switch the database to WAL (it stays switched); False if SQLite refused."""
+    return conn.execute('PRAGMA journal_mode=WAL').fetchone()[0].lower() == 'wal'
+
+def pin(conn):
+    """Open a read transaction so the copy sees one consistent version of the DB."""
+    conn.execute('BEGIN')
+    conn.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+
+def release(conn):
+    if conn.in_transaction: conn.execute('COMMIT')
+
+def gzip_file(src, dst):
+    with open(src, 'rb') as f, gzip.open(dst, 'wb', compresslevel=6) as g:
+        shutil.copyfileobj(f, g, 1 << 20)
+    os.remove(src)
+
+def gunzip_file(src, dst):
+    opener = gzip.open if src.endswith('.gz') else open
+    with opener(src, 'rb') as f, open(dst, 'wb') as g:
+        shutil.copyfileobj(f, g, 1 << 20)
+
+# ── Full snapshots ─────────────────────────────────────────
+def backup_to(src, path, pages=STEP_PAGES, pause=STEP_PAUSE):
+    """Page-stepped copy of src into path, sleeping between steps."""
+    dst = sqlite3.connect(path)
+    try:
+        src.backup(dst, pages=pages, progress=lambda *a: time.sleep(pause))
+    finally:
+        dst.close()
+
+def take_snapshot(db=DB, dest=SNAPSHOT_DIR, compress=True, src=None):
+    """Write school-<stamp>.db[.gz] into dest and return its path.
+
+    The database is switched to WAL and the copy runs inside a read
+    transaction, so writers carry on and the snapshot is a single point in
+    time. In rollback-journal mode the backup API restarts whenever another
+    connection commits, which under steady writes means never finishing, so
+    if WAL is unavailable the copy is made in one step instead.
+    """
+    os.makedirs(dest, exist_ok=True)
+    name = os.path.join(dest, f'school-{stamp()}.db')
+    own  = src is None
+    if own:
+        src = sqlite3.connect(db, isolation_level=None, timeout=30)
+    pages = STEP_PAGES
+    try:
+        if own:
+            if use_wal(src): pin(src)
+            else: pages = -1
+        backup_to(src, name + '.part', pages)
+    finally:
+        if own: release(src); src.close()
+    if compress:
+        gzip_file(name + '.part', name + '.gz'); return name + '.gz'
+    os.replace(name + '.part', name); return name
+
+def list_snapshots(dest=SNAPSHOT_DIR):
+    """Completed snapshots, oldest first."""
+    return sorted(p for p in glob.glob(os.path.join(dest, 'school-*.db*'))
+                  if p.endswith(('.db', '.db.gz')))
+
+def wal_dir(snapshot_path):
+    return snapshot_path.rsplit('.db', 1)[0] + '.wal'
+
+def prune(dest=SNAPSHOT_DIR, keep=7):
+    """Delete all but the newest `keep` snapshots and their WAL archives."""
+    old = list_snapshots(dest)[:-keep] if keep > 0 else []
+    for p in old:
+        os.remove(p)
+        shutil.rmtree(wal_dir(p), ignore_errors=True)
+    return old
+
+# ── Incremental WAL archive ────────────────────────────────
+def read_wal_header(path):
+    """(page_size, salt) of a WAL file, or (0, None) if there is no log yet."""
+    try:
+        with open(path, 'rb') as f: head = f.read(WAL_HEADER)
+    except FileNotFoundError:
+        return 0, None
+    if len(head) < WAL_HEADER: return 0, None
+    return struct.unpack('>I', head[8:12])[0], head[16:24]
+
+def last_commit_end(path, start, page_size, salt):
+    """Byte offset just past the last committed frame of the current log generation."""
+    frame = FRAME_HEAD + page_size
+    end = pos = max(start, WAL_HEADER)
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        while pos + frame <= size:
+            f.seek(pos); head = f.read(FRAME_HEAD)
+            if head[8:16] != salt: break
+            pos += frame
+            if struct.unpack('>I', head[4:8])[0]: end = pos
+    return end
+
+class WalArchiver:
+    """Ships committed WAL frames next to the latest base snapshot.
+
+    Between ticks a read transaction pins the log so SQLite cannot restart
+    it; each tick briefly takes the write lock, copies the frames committed
+    since the previous tick and re-pins. If the log was restarted anyway
+    (salt changed) the chain is re-based on a fresh full snapshot, so a
+    restore never has a gap.
+    """
+    def __init__(self, db=DB, dest=SNAPSHOT_DIR, compress=True):
+        self.db, self.dest, self.compress = db, dest, compress
+        self.wal  = db + '-wal'
+        self.conn = sqlite3.connect(db, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.base = None; self.salt = None; self.offset = 0; self.seq = 0
+
+    def rebase(self):
+        release(self.conn); pin(self.conn)
+        self.salt   = read_wal_header(self.wal)[1]
+        self.base   = take_snapshot(self.db, self.dest, self.compress, src=self.conn)
+        self.offset = 0; self.seq = 0
+        os.makedirs(wal_dir(self.base), exist_ok=True)
+        return self.base
+
+    def tick(self):
+        """Archive newly committed frames; returns the segment path or None."""
+        if self.base is None: return self.rebase() and None
+        release(self.conn)
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            page_size, salt = read_wal_header(self.wal)
+            if salt != self.salt:
+                seg = None; stale = True
+            else:
+                stale = False
+                end = last_commit_end(self.wal, self.offset, page_size, salt) if salt else 0
+                seg = self._ship(end) if end > self.offset else None
+        finally:
+            release(self.conn)
+        if stale: self.rebase(); return None
+        pin(self.conn)
+        return seg
+
+    def _ship(self, end):
+        with open(self.wal, 'rb') as f:
+            f.seek(self.offset); data = f.read(end - self.offset)
+        self.seq += 1
+        path = os.path.join(wal_dir(self.base), f'{self.seq:06d}.wal' + ('.gz' if self.compress else ''))
+        opener = gzip.open if self.compress else open
+        with opener(path + '.part', 'wb') as f: f.write(data)
+        os.replace(path + '.part', path)
+        self.offset = end
+        return path
+
+    def close(self):
+        release(self.conn); self.conn.close()
+
+# ── Scheduler ──────────────────────────────────────────────
+class Snapshotter(threading.Thread):
+    """Background thread: full snapshot every `interval` seconds, keeping `keep`,
+    plus a WAL tick every `wal_interval` seconds when WAL archiving is on."""
+    def __init__(self, db=DB, dest=SNAPSHOT_DIR, interval=3600, keep=7,
+                 compress=True, wal=False, wal_interval=60):
+        super().__init__(daemon=True, name='snapshotter')
+        self.db, self.dest, self.interval, self.keep = db, dest, interval, keep
+        self.compress, self.wal_interval = compress, wal_interval
+        self.archiver = WalArchiver(db, dest, compress) if wal else None
+        self.stop_event = threading.Event()
+
+    def run(self):
+        next_full = 0
+        while not self.stop_event.is_set():
+            now = time.time()
+            try:
+                if now >= next_full:
+                    if self.archiver: self.archiver.rebase()
+                    else: take_snapshot(self.db, self.dest, self.compress)
+                    prune(self.dest, self.keep)
+                    next_full = now + self.interval
+                elif self.archiver:
+                    self.archiver.tick()
+            except Exception as e:
+                print(f'  snapshot failed: {e}')
+            wait = self.wal_interval if self.archiver else self.interval
+            self.stop_event.wait(max(0.0, min(wait, next_full - time.time())))
+        if self.archiver:
+            try: self.archiver.tick()
+            finally: self.archiver.close()
+
+    def stop(self):
+        self.stop_event.set(); self.join()
+
+def start_from_env(db=DB):
+    """Start a Snapshotter configured from SNAPSHOT_* environment variables.
+
+    SNAPSHOT_INTERVAL  minutes between full snapshots (unset/0 = disabled)
+    SNAPSHOT_KEEP      snapshots to retain (default 7)
+    SNAPSHOT_GZIP      0 to store uncompressed (default 1)
+    SNAPSHOT_WAL       seconds between WAL archive ticks (unset/0 = off)
+    """
+    minutes = float(os.environ.get('SNAPSHOT_INTERVAL', 0) or 0)
+    if minutes <= 0: return None
+    wal = float(os.environ.get('SNAPSHOT_WAL', 0) or 0)
+    t = Snapshotter(db, SNAPSHOT_DIR, interval=minutes*60,
+                    keep=int(os.environ.get('SNAPSHOT_KEEP', 7)),
+                    compress=os.environ.get('SNAPSHOT_GZIP', '1') != '0',
+                    wal=wal > 0, wal_interval=wal or 60)
+    t.start()
+    return t
+
+# ── Restore ────────────────────────────────────────────────
+def restore(snapshot_path, db=DB, replay_wal=True):
+    """Rebuild db from a snapshot (plus its archived WAL segments). Stop the server first."""
+    tmp = db + '.restore'
+    for p in (tmp, tmp + '-wal', tmp + '-shm'):
+        if os.path.exists(p): os.remove(p)
+    gunzip_file(snapshot_path, tmp)
+    segments = sorted(glob.glob(os.path.join(wal_dir(snapshot_path), '*.wal*'))) if replay_wal else []
+    segments = [s for s in segments if not s.endswith('.part')]
+    if segments:
+        with open(tmp + '-wal', 'wb') as out:
+            for s in segments:
+                with (gzip.open if s.endswith('.gz') else open)(s, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+    conn = sqlite3.connect(tmp)
+    try:
+        if segments: conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        ok = conn.execute('PRAGMA integrity_check').fetchone()[0]
+    finally:
+        conn.close()
+    if ok != 'ok':
+        raise RuntimeError(f'Restored database failed integrity check: {ok}')
+    for p in (db + '-wal', db + '-shm', tmp + '-wal', tmp + '-shm'):
+        if os.path.exists(p): os.remove(p)
+    os.replace(tmp, db)
+    return len(segments)
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='Snapshot or restore school.db')
+    ap.add_argument('--db',  default=DB)
+    ap.add_argument('--dir', default=SNAPSHOT_DIR)
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    s = sub.add_parser('snapshot', help='take a snapshot now')
+    s.add_argument('--no-gzip', action='store_true')
+    s.add_argument('--keep', type=int, default=0, help='prune to this many afterwards')
+    sub.add_parser('list', help='list snapshots')
+    r = sub.add_parser('restore', help='restore a snapshot over --db')
+    r.add_argument('file')
+    r.add_argument('--no-wal', action='store_true', help='ignore archived WAL segments')
+    a = ap.parse_args(argv)
+
+    if a.cmd == 'snapshot':
+        print(take_snapshot(a.db, a.dir, not a.no_gzip))
+        if a.keep: prune(a.dir, a.keep)
+    elif a.cmd == 'list':
+        for p in list_snapshots(a.dir):
+            segs = len(glob.glob(os.path.join(wal_dir(p), '*.wal*')))
+            print(f'{p}  {os.path.getsize(p):>12,} bytes' + (f'  +{segs} WAL segments' if segs else ''))
+    elif a.cmd == 'restore':
+        n = restore(a.file, a.db, not a.no_wal)
+        print(f'Restored {a.file} → {a.db}' + (f' (+{n} WAL segments)' if n else ''))
+
+if __name__ == '__main__':
+    main()
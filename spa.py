@@ -0,0 +1,145 @@
+"""
+Nyatsime Independent College — split SPA bundle
+index.html stays the single source file. At startup it is cut into a small
+shell, one stylesheet, a core script and lazily loaded per-portal and per-page
+modules (one per `// ── SECTION ──` of the script), each minified, gzipped
+and served under a content-hashed name with immutable caching.
+"""
+
+import os, re, gzip, hashlib, json, threading
+
+HTML_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'index.html')
+
+# Script sections that every portal needs; everything else is loaded on demand.
+CORE = {'STATE', 'NAVIGATION', 'AUTH', 'DASHBOARD SHELL', 'UTILS'}
+# Sections that make up a portal rather than a single page.
+PORTALS = {'ADMIN / STAFF / MASTER PAGES': 'staff', 'HOME': 'staff', 'LEARNER PAGES': 'learner'}
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+TYPES = {'.js': 'application/javascript; charset=utf-8', '.css': 'text/css; charset=utf-8',
+         '.html': 'text/html; charset=utf-8'}
+
+SECTION = re.compile(r'^// (?:═+|──) ([^═─]+?) (?:═+|──)\s*$')
+FUNC    = re.compile(r'^(?:async )?function (\w+)', re.M)
+LEXICAL = re.compile(r'^(?:let|const) (\w+)', re.M)
+
+def module_name(title):
+    if title in PORTALS: return PORTALS[title]
+    return re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')
+
+# ── Minifiers (conservative: whole-line transforms only) ──
+def minify_js(src):
+    out = []
+    for line in src.split('\n'):
+        s = line.strip()
+        if s and not s.startswith('//'): out.append(s)
+    return '\n'.join(out)
+
+def minify_css(src):
+    src = re.sub(r'/\*.*?\*/', '', src, flags=re.S)
+    src = re.sub(r'\s+', ' ', src)
+    return re.sub(r'\s*([{};])\s*', r'\1', src).strip()
+
+def minify_html(src):
+    return '\n'.join(s for s in (l.strip() for l in src.split('\n')) if s)
+
+# ── Splitting ──────────────────────────────────────────────
+def split_script(js):
+    """[(module, code)] in source order; module None = core."""
+    parts, mod, buf = [], None, []
+    for line in js.split('\n'):
+        m = SECTION.match(line)
+        if m:
+            parts.append((mod, '\n'.join(buf))); buf = []
+            title = m.group(1).strip()
+            mod = None if title in CORE else module_name(title)
+        buf.append(line)
+    parts.append((mod, '\n'.join(buf)))
+    merged = {}
+    for mod, code in parts: merged.setdefault(mod, []).append(code)
+    return {k: '\n'.join(v) for k, v in merged.items()}
+
+def loader(urls, deps, funcs):
+    return ('const __mods=' + json.dumps(urls) + ',__deps=' + json.dumps(deps) + ',__loading={};\n'
+            'function __load(m){return __loading[m]||(__loading[m]=Promise.all((__deps[m]||[]).map(__load))'
+            '.then(()=>new Promise((ok,fail)=>{const s=document.createElement("script");s.src=__mods[m];'
+            's.onload=ok;s.onerror=()=>{delete __loading[m];fail(new Error("Could not load "+m));};'
+            'document.head.appendChild(s);})));}\n'
+            'function __stub(m,n){const f=function(...a){return __load(m).then(()=>{'
+            'if(window[n]===f)throw new Error(n+" missing from "+m);return window[n](...a);});};return f;}\n'
+            'Object.entries(' + json.dumps(funcs) + ').forEach(([m,fs])=>fs.forEach(n=>{window[n]=__stub(m,n);}));\n')
+
+class Asset:
+    def __init__(self, body, ctype, cache):
+        self.body, self.ctype, self.cache = body, ctype, cache
+        self.gz   = gzip.compress(body, 9, mtime=0)
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+
+def hashed(name, ext, body):
+    return f'/static/{name}.{hashlib.sha256(body).hexdigest()[:12]}{ext}'
+
+def build(html):
+    """{url: Asset} for the shell ('/') and every static module."""
+    m = re.search(r'^(.*?)<style>(.*?)</style>(.*?)<script>(.*?)</script>(.*)$', html, re.S)
+    if not m:
+        return {'/': Asset(html.encode(), TYPES['.html'], 'no-cache')}
+    head, css, body, js, tail = m.groups()
+    assets = {}
+    def add(name, ext, text):
+        data = text.encode(); url = hashed(name, ext, data)
+        assets[url] = Asset(data, TYPES[ext], IMMUTABLE); return url
+
+    sections = split_script(js)
+    core = sections.pop(None, '')
+    code = {k: minify_js(v) for k, v in sections.items()}
+    urls = {k: add(k, '.js', v) for k, v in code.items()}
+    funcs = {k: FUNC.findall(v) for k, v in sections.items()}
+    lexical = {k: LEXICAL.findall(v) for k, v in sections.items()}
+    deps = {}
+    for k in sections:
+        need = [o for o, names in lexical.items()
+                if o != k and any(re.search(r'\b' + n + r'\b', code[k]) for n in names)]
+        if need: deps[k] = need
+    core_url = add('core', '.js', loader(urls, deps, funcs) + minify_js(core))
+    css_url  = add('app', '.css', minify_css(css))
+    shell = (minify_html(head) + f'\n<link rel="stylesheet" href="{css_url}"/>\n'
+             + minify_html(body) + f'\n<script src="{core_url}"></script>\n' + minify_html(tail))
+    assets['/'] = Asset(shell.encode(), TYPES['.html'], 'no-cache')
+    return assets
+
+# ── Serving ────────────────────────────────────────────────
+_lock, _cache = threading.Lock(), {}
+
+def bundle(path=HTML_FILE):
+    """Built assets for path, rebuilt when the file changes on disk."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {'/': Asset(f'<h1>{os.path.basename(path)} not found</h1>'.encode(), TYPES['.html'], 'no-cache')}
+    with _lock:
+        if _cache.get('key') != (path, mtime):
+            with open(path, encoding='utf-8') as f:
+                _cache['assets'] = build(f.read())
+            _cache['key'] = (path, mtime)
+        return _cache['assets']
+
+def serve(h, p, path=HTML_FILE):
+    """Send the shell or a static module if p names one. Returns True if handled."""
+    if p == '/index.html': p = '/'
+    if p != '/' and not p.startswith('/static/'): return False
+    a = bundle(path).get(p)
+    if not a: return False
+    if h.headers.get('If-None-Match') == a.etag:
+        h.send_response(304); h.send_header('ETag', a.etag); h.send_header('Cache-Control', a.cache)
+        h.end_headers(); return True
+    gz = 'gzip' in h.headers.get('Accept-Encoding', '')
+    body = a.gz if gz else a.body
+    h.send_response(200)
+    h.send_header('Content-Type', a.ctype)
+    h.send_header('Content-Length', str(len(body)))
+    h.send_header('Cache-Control', a.cache)
+    h.send_header('ETag', a.etag)
+    h.send_header('Vary', 'Accept-Encoding')
+    if gz: h.send_header('Content-Encoding', 'gzip')
+    h.end_headers(); h.wfile.write(body)
+    return True